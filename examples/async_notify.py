@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import asyncio
+
+from lmnotify import AsyncLaMetricManager, Model, SimpleFrame
+
+
+async def main():
+    # create an instance of the AsyncLaMetricManager
+    async with AsyncLaMetricManager() as lmn:
+        # get devices
+        devices = await lmn.get_devices()
+
+        # use first device to do some tests
+        await lmn.set_device(devices[0])
+
+        # prepare some notifications that are sent concurrently
+        models = [
+            Model(frames=[SimpleFrame("i210", "Hello #{}!".format(i))])
+            for i in range(3)
+        ]
+
+        # send the notifications to the device
+        await asyncio.gather(*[
+            lmn.send_notification(model)
+            for model in models
+        ])
+
+
+if __name__ == "__main__":
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(main())
+    finally:
+        loop.close()
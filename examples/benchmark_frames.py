@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import tracemalloc
+
+from lmnotify import SimpleFrame, GoalFrame
+
+
+# number of frames that are created per measurement
+COUNT = 100000
+
+
+class BaselineSimpleFrame(object):
+    """
+    simple frame as it was before __slots__ and the cached serialization
+    (instance __dict__ with the public attributes)
+    """
+    def __init__(self, icon, text):
+        self.icon = icon
+        self.text = text
+
+
+class BaselineGoalFrame(object):
+    """
+    goal frame as it was before __slots__ and the cached serialization
+    (instance __dict__ with the public attributes)
+    """
+    def __init__(self, icon, start=0, current=0, end=100, unit="%"):
+        self.icon = icon
+        self.start = start
+        self.current = current
+        self.end = end
+        self.unit = unit
+
+
+def measure(factory):
+    """
+    returns the bytes that are allocated per frame created by the factory
+    """
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    frames = [factory(i) for i in range(COUNT)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # the list itself is not part of the frames
+    return (after - before - frames.__sizeof__()) / float(COUNT)
+
+
+def main():
+    # icons and texts are shared so that only the frames are measured
+    icon, text = "i210", "Hello World!"
+
+    for name, before, after in (
+        (
+            "SimpleFrame",
+            lambda i: BaselineSimpleFrame(icon, text),
+            lambda i: SimpleFrame(icon, text)
+        ),
+        (
+            "GoalFrame",
+            lambda i: BaselineGoalFrame(icon, current=50),
+            lambda i: GoalFrame(icon, current=50)
+        ),
+    ):
+        baseline_size = measure(before)
+        current_size = measure(after)
+        print(
+            "{:<12} baseline: {:6.1f} bytes/frame   current: {:6.1f} "
+            "bytes/frame   ({:.0%} saved)".format(
+                name, baseline_size, current_size,
+                1 - current_size / baseline_size
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import timeit
+import tracemalloc
+
+from lmnotify.ssdp import SSDPResponse
+
+
+# number of responses that are parsed per measurement
+COUNT = 20000
+
+# directory with sample SSDP messages
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "ssdp_corpus")
+
+
+class LegacySSDPResponse(object):
+    """
+    SSDP response parsed via decode, split and setattr
+    (implementation before the byte based parser)
+    """
+    def __init__(self, data):
+        data, addr = data
+        lines = data.decode("utf-8").strip().split("\r\n")
+
+        if lines.pop(0) in ("HTTP/1.1 200 OK", "NOTIFY * HTTP/1.1"):
+            for line in lines:
+                key, value = line.split(":", 1)
+                setattr(self, key.lower(), value.strip())
+
+
+def measure(cls, response):
+    """
+    returns the microseconds and the bytes that are needed per response
+    """
+    seconds = min(timeit.repeat(
+        lambda: cls(response), number=COUNT, repeat=5
+    ))
+
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    responses = [cls(response) for _ in range(COUNT)]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    # the list itself is not part of the responses
+    size = (after - before - responses.__sizeof__()) / float(COUNT)
+
+    return seconds / COUNT * 1e6, size
+
+
+def main():
+    with open(os.path.join(CORPUS_DIR, "search_response.bin"), "rb") as f:
+        response = (f.read(), ("192.168.1.23", 1900))
+
+    for name, cls in (
+        ("legacy", LegacySSDPResponse),
+        ("bytes", SSDPResponse),
+    ):
+        us, size = measure(cls, response)
+        print(
+            "{:<8} {:6.2f} us/response   {:6.1f} bytes/response".format(
+                name, us, size
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
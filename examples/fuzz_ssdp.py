@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+import random
+
+from lmnotify.ssdp import SSDPResponse
+
+
+# number of mutations that are parsed per sample of the corpus
+MUTATIONS = 2000
+
+# directory with sample SSDP messages
+CORPUS_DIR = os.path.join(os.path.dirname(__file__), "ssdp_corpus")
+
+
+def load_corpus():
+    """
+    returns the sample messages of the corpus by their filename
+    """
+    corpus = {}
+    for filename in sorted(os.listdir(CORPUS_DIR)):
+        with open(os.path.join(CORPUS_DIR, filename), "rb") as f:
+            corpus[filename] = f.read()
+
+    return corpus
+
+
+def mutate(data, rnd):
+    """
+    returns a copy of the data with random bytes flipped, inserted,
+    removed or truncated
+    """
+    data = bytearray(data)
+    for _ in range(rnd.randint(1, 8)):
+        op = rnd.randint(0, 3)
+        pos = rnd.randint(0, len(data))
+        if op == 0 and data:
+            data[min(pos, len(data) - 1)] = rnd.randint(0, 255)
+        elif op == 1:
+            data[pos:pos] = rnd.choice(
+                (b":", b"\r\n", b"\n", b"\r", b"\x00", b" ", b"\xff")
+            )
+        elif op == 2:
+            del data[pos:pos + rnd.randint(1, 16)]
+        else:
+            del data[pos:]
+
+    return bytes(data)
+
+
+def main():
+    rnd = random.Random(int(sys.argv[1]) if len(sys.argv) > 1 else 0)
+    addr = ("192.168.1.23", 1900)
+
+    corpus = load_corpus()
+    for filename, data in corpus.items():
+        r = SSDPResponse((data, addr))
+        print("{:<26} {}".format(filename, r))
+
+        for _ in range(MUTATIONS):
+            # the parser must never raise for any input
+            r = SSDPResponse((mutate(data, rnd), addr))
+            getattr(r, "usn", None)
+            getattr(r, "location", None)
+
+    print(
+        "parsed {} mutations without errors".format(
+            len(corpus) * MUTATIONS
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,29 @@
 __all__ = [
     "LaMetricManager", "SimpleFrame", "GoalFrame", "SpikeChart",
-    "Sound", "Model", "CloudSession", "LocalSession"
+    "Sound", "Model", "CloudSession", "LocalSession", "RequestPolicy",
+    "AppListCache", "NotificationCoalescer", "RateLimiter",
+    "RateLimitExceeded", "NotificationDispatcher", "NotificationDropped",
+    "DedupCache", "IconEncoder", "NotificationTemplate", "Placeholder",
+    "SSDPListener", "TokenCache", "DeviceStore"
 ]
 
 from .lmnotify import LaMetricManager
 from .models import SimpleFrame, GoalFrame, SpikeChart, Sound, Model
 from .session import CloudSession, LocalSession
+from .policy import RequestPolicy
+from .cache import AppListCache, TokenCache
+from .coalesce import NotificationCoalescer
+from .ratelimit import RateLimiter, RateLimitExceeded
+from .dispatcher import NotificationDispatcher, NotificationDropped
+from .dedup import DedupCache
+from .icons import IconEncoder
+from .template import NotificationTemplate, Placeholder
+from .listener import SSDPListener
+from .store import DeviceStore
+
+# the asyncio client is only available, when aiohttp is installed
+try:
+    from .aio import AsyncLaMetricManager
+    __all__.append("AsyncLaMetricManager")
+except ImportError:
+    pass
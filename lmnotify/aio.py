@@ -0,0 +1,910 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import sys
+import asyncio
+import logging
+import functools
+
+import aiohttp
+from oauthlib.oauth2 import BackendApplicationClient
+
+from .const import CLOUD_URLS, DEVICE_URLS, DEFAULT_BROADCAST_WORKERS, \
+    DEFAULT_POOL_MAXSIZE, DEFAULT_POOL_MAX_IDLE, DEFAULT_CONNECT_TIMEOUT, \
+    DEFAULT_READ_TIMEOUT, DEFAULT_DEADLINE, DEFAULT_TOKEN_REFRESH_MARGIN, \
+    DEFAULT_TOKEN_EXPIRY_MARGIN
+from .cache import get_token_remaining
+from .lmnotify import LaMetricManager, JSON_HEADERS
+from .policy import FAILURE_CONNECT, FAILURE_READ
+
+
+# prepare custom logger
+log = logging.getLogger(__name__)
+
+# errors of connection attempts that timed out (only raised by aiohttp>=3.10)
+CONNECT_TIMEOUT_ERRORS = tuple(
+    error
+    for error in (getattr(aiohttp, "ConnectionTimeoutError", None),)
+    if error is not None
+)
+
+
+# marker of the end of a generator that is iterated in the executor
+_STOP = object()
+
+
+def run_blocking(func, *args, **kwargs):
+    """
+    runs a blocking call, e.g. file I/O or the SSDP discovery, in the
+    default executor, so that the event loop is not blocked
+
+    :param callable func: the blocking function
+    :return: awaitable of the result of the function
+    """
+    return asyncio.get_event_loop().run_in_executor(
+        None, functools.partial(func, *args, **kwargs)
+    )
+
+
+class AsyncIterator(object):
+    """
+    asynchronous iterator over a blocking iterator whose items are
+    obtained in the default executor
+    """
+    def __init__(self, iterator):
+        """
+        initiate the asynchronous iterator
+
+        :param iterator: the blocking iterator, e.g. a generator
+        """
+        self._iterator = iterator
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        item = await run_blocking(next, self._iterator, _STOP)
+        if item is _STOP:
+            raise StopAsyncIteration
+
+        return item
+
+
+class AsyncLocalSession(object):
+    """
+    asynchronous local session that directly communicates with the
+    LaMetric device without using the Cloud-API
+    """
+    def __init__(
+        self, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+        max_idle=DEFAULT_POOL_MAX_IDLE, limit=100
+    ):
+        """
+        initiate the asynchronous local session
+
+        :param int pool_maxsize: maximum number of connections per device
+        :param float max_idle: seconds after which idle connections of a
+                               device are closed
+        :param int limit: maximum number of simultaneous connections
+        """
+        self._session = None
+        self._pool_maxsize = pool_maxsize
+        self._max_idle = max_idle
+        self._limit = limit
+
+        # authentication of the devices is only computed once per device
+        self._auths = {}
+
+    async def get_session(self):
+        """
+        returns the aiohttp session
+        (will be created on first access)
+        """
+        if (self._session is None) or self._session.closed:
+            self.init_session()
+
+        return self._session
+
+    def init_session(self):
+        """
+        init the local session (certificates of the device are self-signed,
+        therefore, they are not verified)
+        """
+        self._session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(
+                ssl=False, limit=self._limit,
+                limit_per_host=self._pool_maxsize,
+                keepalive_timeout=self._max_idle
+            )
+        )
+
+    def get_auth(self, dev):
+        """
+        returns the basic authentication of the given device
+
+        :param dict dev: device the authentication is used for
+        """
+        try:
+            return self._auths[dev["api_key"]]
+        except KeyError:
+            auth = aiohttp.BasicAuth("dev", dev["api_key"])
+            self._auths[dev["api_key"]] = auth
+            return auth
+
+    def is_configured(self):
+        """
+        local session is always configured
+        """
+        return True
+
+    async def close(self):
+        """
+        close the underlying aiohttp session
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncCloudSession(object):
+    """
+    asynchronous cloud session that uses authentication via OAuth2 with
+    the LaMetric Cloud
+    """
+    def __init__(
+        self, client_id=None, client_secret=None, token_cache=None,
+        refresh_margin=DEFAULT_TOKEN_REFRESH_MARGIN
+    ):
+        """
+        initiate the asynchronous cloud session
+
+        :param str client_id: client id of the LaMetric cloud
+        :param str client_secret: client secret of the LaMetric cloud
+        :param TokenCache token_cache: cache to reuse tokens across
+                                       processes (default: no cache)
+        :param float refresh_margin: seconds before its expiry at which
+                                     the token is refreshed in the background
+        """
+        self._session = None
+        self._client = None
+        self._token_cache = token_cache
+        self._refresh_margin = refresh_margin
+        self._refresh_task = None
+        self.token = None
+
+        self.set_credentials(client_id, client_secret)
+
+    def set_credentials(self, client_id=None, client_secret=None):
+        """
+        set given credentials and reset the session
+        """
+        self._client_id = client_id
+        self._client_secret = client_secret
+
+        # make sure to reset session due to credential change
+        self._session = None
+        self._client = None
+        self.token = None
+
+    def is_configured(self):
+        """
+        returns True, if cloud session is configured
+        """
+        return self._session is not None
+
+    async def get_session(self):
+        """
+        returns the aiohttp session
+        (will be created and authenticated on first access, its token is
+        refreshed shortly before it expires)
+        """
+        if (self._session is None) or self._session.closed:
+            await self.init_session()
+
+        await self._check_token()
+
+        return self._session
+
+    async def init_session(self, get_token=True):
+        """
+        init a new aiohttp session that is required to access the cloud
+
+        :param bool get_token: if True, a token will be obtained (from the
+                               token cache, if still valid), after
+                               the session has been created
+        """
+        if (self._client_id is None) or (self._client_secret is None):
+            sys.exit(
+                "Please make sure to set the client id and client secret "
+                "via the constructor, the environment variables or the config "
+                "file; otherwise, the LaMetric cloud cannot be accessed. "
+                "Abort!"
+            )
+
+        self._client = BackendApplicationClient(client_id=self._client_id)
+        self._session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(
+                total=DEFAULT_DEADLINE, sock_connect=DEFAULT_CONNECT_TIMEOUT,
+                sock_read=DEFAULT_READ_TIMEOUT
+            )
+        )
+
+        if get_token is True:
+            token = await self._get_cached_token(DEFAULT_TOKEN_EXPIRY_MARGIN)
+            if token is not None:
+                log.debug("using cached oauth token...")
+                self._set_token(token)
+            else:
+                # get oauth token
+                await self.get_token()
+
+    async def get_token(self):
+        """
+        get current oauth token via the client credentials grant
+        """
+        log.debug("getting oauth token...")
+        body = self._client.prepare_request_body(
+            include_client_id=True, client_secret=self._client_secret
+        )
+        headers = {
+            "Accept": "application/json",
+            "Content-Type": "application/x-www-form-urlencoded",
+        }
+        async with self._session.post(
+            CLOUD_URLS["get_token"][1], data=body, headers=headers
+        ) as res:
+            res.raise_for_status()
+            self.token = self._client.parse_request_body_response(
+                await res.text()
+            )
+
+        if self._token_cache is not None:
+            await run_blocking(
+                self._token_cache.set, self._client_id, dict(self.token)
+            )
+
+    def _set_token(self, token):
+        """
+        set the token that authenticates the requests of the session
+
+        :param dict token: oauth token with expires_at timestamp
+        """
+        self.token = token
+        self._client.token = token
+        self._client.populate_token_attributes(token)
+
+    async def _get_cached_token(self, margin):
+        """
+        returns the cached token, if it is valid for more than the given
+        seconds or None
+
+        :param float margin: seconds the token must still be valid
+        """
+        if self._token_cache is None:
+            return None
+
+        token = await run_blocking(self._token_cache.get, self._client_id)
+        if (token is None) or (get_token_remaining(token) <= margin):
+            return None
+
+        return token
+
+    async def _check_token(self):
+        """
+        renews an expired token and refreshes a token that expires soon
+        in the background
+        """
+        if (self.token is None) or ("expires_at" not in self.token):
+            return
+
+        remaining = get_token_remaining(self.token)
+        if remaining <= DEFAULT_TOKEN_EXPIRY_MARGIN:
+            # token is not usable anymore => renew it now (a running
+            # refresh is awaited, so that the token is only obtained once)
+            if self._refresh_task is not None:
+                await asyncio.shield(self._refresh_task)
+
+            if get_token_remaining(self.token) <= DEFAULT_TOKEN_EXPIRY_MARGIN:
+                if self._refresh_task is None:
+                    self._refresh_task = asyncio.ensure_future(self._renew())
+                await asyncio.shield(self._refresh_task)
+
+        elif (remaining <= self._refresh_margin) and (
+            self._refresh_task is None
+        ):
+            self._refresh_task = asyncio.ensure_future(
+                self._refresh_in_background()
+            )
+
+    async def _refresh(self):
+        """
+        uses a token that another process has obtained meanwhile or
+        gets a new token
+        """
+        token = await self._get_cached_token(self._refresh_margin)
+        if (token is not None) and (
+            token.get("expires_at") != self.token.get("expires_at")
+        ):
+            log.debug("using oauth token refreshed by another process...")
+            self._set_token(token)
+        else:
+            await self.get_token()
+
+    async def _renew(self):
+        """
+        renews the token while the requests wait for it
+        """
+        try:
+            await self._refresh()
+
+        finally:
+            self._refresh_task = None
+
+    async def _refresh_in_background(self):
+        """
+        refreshes the token while the current token is still used
+        """
+        try:
+            await self._refresh()
+
+        except Exception as e:
+            # the token is renewed on the next request, if it expires
+            log.warning("cannot refresh oauth token: {}".format(e))
+
+        finally:
+            self._refresh_task = None
+
+    def add_token(self, url, http_method="GET"):
+        """
+        returns the URL and the headers that authenticate a request
+        with the current oauth token
+
+        :param str url: URL of the cloud API
+        :param str http_method: one of the REST commands, e.g. GET or POST
+        """
+        url, headers, _ = self._client.add_token(url, http_method=http_method)
+
+        return url, headers
+
+    async def close(self):
+        """
+        close the underlying aiohttp session
+        """
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class AsyncLaMetricManager(LaMetricManager):
+    """
+    asyncio variant of the LaMetricManager. All calls that communicate with
+    the device or the cloud are coroutines and must be awaited, e.g.
+
+        async with AsyncLaMetricManager() as lmn:
+            devices = await lmn.get_devices()
+            await lmn.set_device(devices[0])
+            await lmn.send_notification(model)
+
+    Calls that do not require any post-processing of the result are
+    inherited from the LaMetricManager and return the awaitable
+    of _exec directly. Calls that block, e.g. the discovery or file I/O
+    of the caches, are run in the default executor. Only the constructor,
+    that loads the config file, blocks the event loop.
+    """
+    local_session_class = AsyncLocalSession
+    cloud_session_class = AsyncCloudSession
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def close(self):
+        """
+        close the local and the cloud session
+        """
+        await self._local_session.close()
+        await self._cloud_session.close()
+
+    async def _request(
+        self, session, cmd, url, policy=None, with_status=False, dev=None,
+        priority=None, **kwargs
+    ):
+        """
+        execute an HTTP request with the timeouts and retries of the
+        request policy and return the decoded json result
+
+        :param aiohttp.ClientSession session: the session used for the request
+        :param str cmd: one of the REST commands, e.g. GET or POST
+        :param str url: URL of the request
+        :param RequestPolicy policy: policy overriding the default policy
+        :param bool with_status: if True, the status and the headers of the
+                                 response are returned with the result
+        :param dict dev: device whose rate limit applies to each attempt
+                         (default: requests are not limited)
+        :param str priority: priority of a notification that is used
+                             by the rate limiter
+        """
+        policy = policy or self.request_policy
+        deadline = policy.get_deadline()
+
+        attempt = 0
+        while True:
+            if (dev is not None) and (self.rate_limiter is not None):
+                # wait until the device accepts further requests
+                await self.rate_limiter.acquire_async(dev, priority)
+
+            connect_timeout, read_timeout = policy.get_timeout(deadline)
+            timeout = aiohttp.ClientTimeout(
+                total=policy.get_remaining(deadline),
+                sock_connect=connect_timeout, sock_read=read_timeout
+            )
+
+            try:
+                async with session.request(
+                    cmd, url, timeout=timeout, **kwargs
+                ) as res:
+                    failure = res.status
+                    delay = policy.get_retry_delay(
+                        cmd, attempt, failure, deadline
+                    )
+                    if delay is None:
+                        # raise an exception on error
+                        res.raise_for_status()
+
+                        result = await res.json(content_type=None)
+                        if with_status:
+                            return res.status, res.headers, result
+
+                        return result
+
+            except aiohttp.ClientConnectorError:
+                failure = FAILURE_CONNECT
+                delay = policy.get_retry_delay(cmd, attempt, failure, deadline)
+                if delay is None:
+                    raise
+
+            except (
+                aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                asyncio.TimeoutError
+            ) as e:
+                # e.g. the connection has been reset or closed after the
+                # request has been sent
+                failure = (
+                    FAILURE_CONNECT if isinstance(e, CONNECT_TIMEOUT_ERRORS)
+                    else FAILURE_READ
+                )
+                delay = policy.get_retry_delay(cmd, attempt, failure, deadline)
+                if delay is None:
+                    raise
+
+            log.debug(
+                "{} '{}' failed ({}), retrying in {:.2f}s...".format(
+                    cmd, url, failure, delay
+                )
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _exec(
+        self, cmd, url, json_data=None, dev=None, policy=None, priority=None,
+        data=None
+    ):
+        """
+        execute a command at the device using the RESTful API
+
+        :param str cmd: one of the REST commands, e.g. GET or POST
+        :param str url: URL of the REST API the command should be applied to
+        :param dict json_data: json data that should be attached to the command
+        :param dict dev: device the command is sent to
+                         (default: the current device set via set_device)
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        :param str priority: priority of a notification that is used
+                             by the rate limiter
+        :param bytes data: already encoded json body that is sent instead
+                           of the json data
+        """
+        dev = dev or self.dev
+
+        assert(cmd in ("GET", "POST", "PUT", "DELETE"))
+        assert(dev is not None)
+
+        if json_data is None:
+            json_data = {}
+
+        # add device address to the URL
+        url = url.format(dev["ipv4_internal"])
+
+        # get cached basic authentication of the device
+        auth = self._local_session.get_auth(dev)
+
+        # only attach the json data to commands that carry a body
+        kwargs = {"auth": auth}
+        if data is not None:
+            kwargs["data"] = data
+            kwargs["headers"] = JSON_HEADERS
+        elif cmd in ("POST", "PUT"):
+            kwargs["json"] = json_data
+
+        # execute HTTP request
+        session = await self._local_session.get_session()
+        return await self._request(
+            session, cmd, url, policy=policy, dev=dev, priority=priority,
+            **kwargs
+        )
+
+    async def send_notification(
+        self, model, priority="warning", icon_type=None, lifetime=None,
+        dev=None, policy=None
+    ):
+        """
+        sends new notification to the device
+
+        :param Model model: an instance of the Model class that should be used
+        :param str priority: the priority of the notification
+                             [info, warning or critical] (default: warning)
+        :param str icon_type: the icon type of the notification
+                              [none, info or alert] (default: None)
+        :param int lifetime: the lifetime of the notification in ms
+                             (default: 2 min)
+        :param dict dev: device the notification is sent to
+                         (default: the current device set via set_device)
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        :return: result of the call or None, if the notification has been
+                 suppressed as duplicate
+        """
+        cmd, url, data = self._prepare_notification(
+            model, priority, icon_type, lifetime
+        )
+
+        if self._is_duplicate_notification(
+            model, priority, icon_type, lifetime, dev
+        ):
+            return None
+
+        log.debug("sending notification...")
+
+        try:
+            return await self._exec(
+                cmd, url, data=data, dev=dev, policy=policy,
+                priority=priority
+            )
+
+        except Exception:
+            self._forget_notification(
+                model, priority, icon_type, lifetime, dev
+            )
+            raise
+
+    async def broadcast_notification(
+        self, devices, model, priority="warning", icon_type=None,
+        lifetime=None, max_workers=DEFAULT_BROADCAST_WORKERS, policy=None
+    ):
+        """
+        sends the same notification concurrently to multiple devices
+
+        :param list devices: devices the notification is sent to
+                             (can be obtained via get_devices function)
+        :param Model model: an instance of the Model class that should be used
+        :param str priority: the priority of the notification
+                             [info, warning or critical] (default: warning)
+        :param str icon_type: the icon type of the notification
+                              [none, info or alert] (default: None)
+        :param int lifetime: the lifetime of the notification in ms
+                             (default: 2 min)
+        :param int max_workers: maximum number of notifications that are
+                                sent in parallel
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        :return: for each device (in the same order as the given devices)
+                 either the result of the call or the raised exception
+        :rtype: list
+        """
+        assert(max_workers > 0)
+
+        log.debug(
+            "broadcasting notification to {} devices...".format(len(devices))
+        )
+
+        semaphore = asyncio.Semaphore(max_workers)
+
+        async def send(dev):
+            async with semaphore:
+                return await self.send_notification(
+                    model, priority=priority, icon_type=icon_type,
+                    lifetime=lifetime, dev=dev, policy=policy
+                )
+
+        return await asyncio.gather(
+            *[send(dev) for dev in devices], return_exceptions=True
+        )
+
+    async def set_device(self, dev):
+        """
+        set the current device (that will be used for following API calls)
+
+        :param dict dev: device that should be used for the API calls
+                         (can be obtained via get_devices function)
+        """
+        log.debug("setting device to '{}'".format(dev))
+        self.dev = dev
+        await self.set_apps_list()
+
+    # ----- rest api calls on cloud ------
+    async def _cloud_exec(
+        self, cmd, url, headers=None, with_status=False, policy=None
+    ):
+        """
+        execute an authenticated command on the cloud
+
+        :param str cmd: one of the REST commands, e.g. GET or POST
+        :param str url: URL of the cloud API
+        :param dict headers: additional headers of the request
+        :param bool with_status: if True, the status and the headers of the
+                                 response are returned with the result
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        """
+        session = await self._cloud_session.get_session()
+        url, token_headers = self._cloud_session.add_token(
+            url, http_method=cmd
+        )
+        headers = dict(headers or {}, **token_headers)
+
+        return await self._request(
+            session, cmd, url, headers=headers, with_status=with_status,
+            policy=policy
+        )
+
+    async def get_user(self, policy=None):
+        """
+        get the user details via the cloud
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        """
+        log.debug("getting user information from LaMetric cloud...")
+        cmd, url = CLOUD_URLS["get_user"]
+        return await self._cloud_exec(cmd, url, policy=policy)
+
+    async def get_devices(
+        self, force_reload=False, save_devices=True, policy=None
+    ):
+        """
+        get all devices that are linked to the user, if the local device
+        file is not existing the devices will be obtained from the LaMetric
+        cloud, otherwise the local device file will be read. The devices are
+        kept in memory, so the file is only read again when it has been
+        modified and the cloud is only asked again after the devices TTL
+        (via a conditional request, if supported by the cloud)
+
+        :param bool force_reload: When True, devices are read again from cloud
+        :param bool save_devices: When True, devices obtained from the LaMetric
+                                  cloud are stored locally
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        """
+        devices = await run_blocking(self._get_cached_devices, force_reload)
+        if devices is not None:
+            return devices
+
+        # -- load devices from LaMetric cloud --
+        log.debug("getting devices from LaMetric cloud...")
+        cmd, url = CLOUD_URLS["get_devices"]
+        status, headers, devices = await self._cloud_exec(
+            cmd, url, headers=self._devices_cache.get_validators(),
+            with_status=True, policy=policy
+        )
+
+        return await run_blocking(
+            self._set_cloud_devices, status, headers, devices, save_devices
+        )
+
+    async def save_devices(self):
+        """
+        save devices that have been obtained from LaMetric cloud
+        to a local file (or the device store, if set)
+        """
+        await run_blocking(self._save_devices)
+
+    async def load_devices(self):
+        """
+        load stored devices from the local file (only read again, if it
+        has been modified)
+        """
+        return await run_blocking(super().load_devices)
+
+    async def find_devices(self, **keys):
+        """
+        returns the devices obtained via get_devices that match all given
+        attributes, e.g. find_devices(serial_number="SA1234567890")
+
+        :param keys: values of id, name, serial_number or ipv4_internal
+        """
+        return await run_blocking(super().find_devices, **keys)
+
+    # ----- discovery of devices in the local network ------
+    async def discover_devices(self, timeout=2, interfaces=None):
+        """
+        returns all LaMetric devices in the local network,
+        discovered via UPNP (or the devices known by the device listener,
+        if it has been started)
+
+        :param float timeout: seconds to wait for replies to the discovery
+                              and for the descriptions of the devices
+        :param interfaces: IP addresses of the local interfaces the search
+                           is sent from, "all" for all interfaces or None
+                           for the default interface
+        """
+        return await run_blocking(
+            super().discover_devices, timeout=timeout, interfaces=interfaces
+        )
+
+    def iter_discovered_devices(
+        self, timeout=2, expected_count=None, interfaces=None
+    ):
+        """
+        asynchronous iterator that yields the UDN and the attributes of each
+        LaMetric device in the local network as soon as it has been
+        discovered, e.g.
+
+            async for udn, attrs in lmn.iter_discovered_devices():
+                ...
+
+        :param float timeout: seconds to wait for further replies to the
+                              discovery and for the descriptions
+        :param int expected_count: if set, the discovery ends as soon as
+                                   this number of devices has been found
+        :param interfaces: IP addresses of the local interfaces the search
+                           is sent from, "all" for all interfaces or None
+                           for the default interface
+        """
+        return AsyncIterator(
+            super().iter_discovered_devices(
+                timeout=timeout, expected_count=expected_count,
+                interfaces=interfaces
+            )
+        )
+
+    async def start_device_listener(self, callback=None, interface="0.0.0.0"):
+        """
+        starts listening to the announcements of LaMetric devices in the
+        background (the callback is called from the listener threads)
+
+        :param callable callback: called with the event (added, updated or
+                                  removed), the UDN and the attributes of a
+                                  device whenever a device changes
+        :param str interface: IP address of the interface that joins the
+                              multicast group (default: any interface)
+        :rtype: SSDPListener
+        """
+        return await run_blocking(
+            super().start_device_listener, callback=callback,
+            interface=interface
+        )
+
+    async def stop_device_listener(self):
+        """
+        stops listening to the announcements of LaMetric devices
+        """
+        await run_blocking(super().stop_device_listener)
+
+    # ----- rest api calls for app control on device ------
+    async def set_apps_list(self, force_reload=False, policy=None):
+        """
+        gets installed apps and puts them into the available_apps list
+
+        :param bool force_reload: When True, apps are read again from the
+                                  device even if they are cached
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        """
+        result = None
+        if not force_reload:
+            result = await run_blocking(self._apps_cache.get, self.dev)
+
+        if result is None:
+            log.debug(
+                "getting apps and setting them in the internal app list..."
+            )
+            cmd, url = DEVICE_URLS["get_apps_list"]
+            result = await self._exec(cmd, url, policy=policy)
+            await run_blocking(self._apps_cache.set, self.dev, result)
+
+        self._set_available_apps(result)
+
+    async def invalidate_apps_list(self, dev=None):
+        """
+        removes the cached apps list so that it is obtained from the device
+        on the next access
+
+        :param dict dev: device whose apps list is removed from the cache
+                         (default: the apps lists of all devices are removed)
+        """
+        await run_blocking(super().invalidate_apps_list, dev)
+
+    async def switch_to_app(self, package, policy=None):
+        """
+        activates an app that is specified by package. Selects the first
+        app it finds in the app list
+
+        :param str package: name of package/app
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        """
+        log.debug("switching to app '{}'...".format(package))
+        cmd, url = DEVICE_URLS["switch_to_app"]
+        widget_id = self._get_widget_id(package)
+
+        url = url.format('{}', package, widget_id)
+
+        self.result = await self._exec(cmd, url, policy=policy)
+
+    async def switch_to_next_app(self, policy=None):
+        """
+        switches to the next app
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        """
+        log.debug("switching to next app...")
+        cmd, url = DEVICE_URLS["switch_to_next_app"]
+        self.result = await self._exec(cmd, url, policy=policy)
+
+    async def switch_to_prev_app(self, policy=None):
+        """
+        switches to the previous app
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        """
+        log.debug("switching to previous app...")
+        cmd, url = DEVICE_URLS["switch_to_prev_app"]
+        self.result = await self._exec(cmd, url, policy=policy)
+
+    async def activate_widget(self, package, policy=None):
+        """
+        activate the widget of the given package
+
+        :param str package: name of the package
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        """
+        cmd, url = DEVICE_URLS["activate_widget"]
+
+        # get widget id for the package
+        widget_id = self._get_widget_id(package)
+        url = url.format('{}', package, widget_id)
+
+        self.result = await self._exec(cmd, url, policy=policy)
+
+    async def _app_exec(self, package, action, params=None, policy=None):
+        """
+        meta method for all interactions with apps
+
+        :param str package: name of package/app
+        :param str action: the action to be executed
+        :param dict params: optional parameters for this action
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        :return: result of the action
+        :rtype: dict
+        """
+        if action not in self._get_app_actions(package):
+            # cached apps list might be outdated
+            await self.set_apps_list(force_reload=True, policy=policy)
+
+        cmd, url, json_data = self._prepare_app_exec(package, action, params)
+
+        self.result = await self._exec(
+            cmd, url, json_data=json_data, policy=policy
+        )
+
+        return self.result
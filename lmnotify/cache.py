@@ -0,0 +1,443 @@
+import os
+import json
+import time
+import codecs
+import asyncio
+import logging
+import tempfile
+import threading
+
+from .const import DEFAULT_APPS_TTL, TOKEN_FILENAME
+
+
+# prepare custom logger
+log = logging.getLogger(__name__)
+
+
+def write_file(filename, data, prefix):
+    """
+    replaces the content of the given file via a temporary file in the
+    same directory, so that concurrent readers never see a partially
+    written file
+
+    :param str filename: filename of the file
+    :param str data: new content of the file
+    :param str prefix: prefix of the temporary file
+    """
+    fd, tmp_filename = tempfile.mkstemp(
+        dir=os.path.dirname(filename) or ".", prefix=prefix
+    )
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+        os.replace(tmp_filename, filename)
+
+    except Exception:
+        os.remove(tmp_filename)
+        raise
+
+
+def get_device_key(dev):
+    """
+    returns the key that identifies the given device in caches
+
+    :param dict dev: device as obtained via get_devices
+    """
+    return str(dev.get("id", dev["ipv4_internal"]))
+
+
+def check_sync_manager(manager):
+    """
+    raises a TypeError, if the given manager sends its notifications
+    asynchronously, as its results cannot be awaited from worker threads
+
+    :param LaMetricManager manager: manager used to send notifications
+    """
+    if asyncio.iscoroutinefunction(manager.send_notification):
+        raise TypeError(
+            "notifications of an AsyncLaMetricManager cannot be sent "
+            "from threads"
+        )
+
+
+class AppListCache(object):
+    """
+    cache of the installed apps per device that expires after a TTL and
+    can optionally be persisted to a local file
+    """
+    def __init__(self, ttl=DEFAULT_APPS_TTL, filename=None):
+        """
+        initiate the app list cache
+
+        :param float ttl: seconds after which the app list of a device
+                          is obtained from the device again
+        :param str filename: if set, the cache is persisted to this file,
+                             e.g. APPS_FILENAME next to the devices file
+        """
+        assert(ttl > 0)
+
+        self._ttl = ttl
+        self._filename = (
+            os.path.expanduser(filename) if filename is not None else None
+        )
+
+        # apps list result and timestamp per device key
+        self._entries = {}
+        self._lock = threading.Lock()
+
+        self.load()
+
+    def get(self, dev):
+        """
+        returns the cached apps list result of the given device or None,
+        if it is not cached or has expired
+
+        :param dict dev: device as obtained via get_devices
+        """
+        with self._lock:
+            entry = self._entries.get(get_device_key(dev))
+
+        if (entry is None) or (time.time() - entry["timestamp"] > self._ttl):
+            return None
+
+        return entry["apps"]
+
+    def set(self, dev, apps):
+        """
+        stores the apps list result of the given device
+
+        :param dict dev: device as obtained via get_devices
+        :param dict apps: result of the get_apps_list call
+        """
+        with self._lock:
+            self._entries[get_device_key(dev)] = {
+                "timestamp": time.time(),
+                "apps": apps
+            }
+
+        self.save()
+
+    def invalidate(self, dev=None):
+        """
+        removes the apps list of the given device from the cache
+
+        :param dict dev: device as obtained via get_devices
+                         (default: all devices are removed)
+        """
+        with self._lock:
+            if dev is None:
+                self._entries = {}
+            else:
+                self._entries.pop(get_device_key(dev), None)
+
+        self.save()
+
+    def load(self):
+        """
+        load the persisted cache from the local file, if existing
+        """
+        if (self._filename is None) or not os.path.exists(self._filename):
+            return
+
+        log.debug("loading apps from '{}'...".format(self._filename))
+        try:
+            with codecs.open(self._filename, "rb", "utf-8") as f:
+                entries = json.load(f)
+
+        except (IOError, OSError, ValueError):
+            # just ignore a corrupted or unreadable cache file
+            log.debug("skipping invalid apps file '{}'".format(self._filename))
+            return
+
+        if not isinstance(entries, dict):
+            log.debug("skipping invalid apps file '{}'".format(self._filename))
+            return
+
+        with self._lock:
+            self._entries = entries
+
+    def save(self):
+        """
+        persist the cache to the local file, if a filename is set
+        """
+        if self._filename is None:
+            return
+
+        log.debug("saving apps to '{}'...".format(self._filename))
+        with self._lock:
+            data = json.dumps(self._entries)
+
+        try:
+            write_file(self._filename, data, ".lmapps-")
+
+        except (IOError, OSError) as e:
+            # the cache is optional, so the apps are just obtained again
+            log.warning(
+                "cannot save apps to '{}': {}".format(self._filename, e)
+            )
+
+
+def get_file_stamp(filename):
+    """
+    returns the modification time and the size of the given file or None,
+    if it is not existing
+
+    :param str filename: filename of the file
+    """
+    try:
+        stat = os.stat(filename)
+
+    except OSError:
+        return None
+
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class DeviceListCache(object):
+    """
+    in-memory cache of the devices that reads the stored devices again
+    only when they have been modified and that optionally expires after a
+    TTL, so that the devices are obtained from the cloud again
+    """
+    def __init__(self, storage, ttl=None):
+        """
+        initiate the device list cache
+
+        :param storage: storage of the devices, i.e. a DeviceFile or a
+                        DeviceStore
+        :param float ttl: seconds after which the devices are obtained from
+                          the cloud again (default: never)
+        """
+        assert((ttl is None) or (ttl > 0))
+
+        self.storage = storage
+        self._ttl = ttl
+
+        # cached devices, whether they are stored and the stamp of the
+        # storage they were read from
+        self._devices = None
+        self._stored = False
+        self._stamp = None
+
+        # time the devices were last obtained or confirmed by the cloud
+        self._timestamp = None
+
+        # validators of the last cloud response for conditional requests
+        self._validators = {}
+
+        self._lock = threading.Lock()
+
+    def get(self):
+        """
+        returns the cached devices or None, if they are not known or have
+        expired and must be obtained from the cloud
+        """
+        stamp = self.storage.get_stamp()
+        with self._lock:
+            self._update(stamp)
+
+            if (self._devices is None) or (
+                (self._ttl is not None) and
+                (time.time() - self._timestamp > self._ttl)
+            ):
+                return None
+
+            return self._devices
+
+    def load(self):
+        """
+        returns the stored devices or an empty list, if there are none
+        """
+        stamp = self.storage.get_stamp()
+        with self._lock:
+            self._update(stamp)
+
+            return self._devices if self._stored else []
+
+    def _update(self, stamp):
+        """
+        reads the stored devices again, if they have been modified, removed
+        or not been read yet
+
+        :param stamp: current stamp of the storage
+        """
+        if stamp == self._stamp:
+            return
+
+        entry = self.storage.read() if stamp is not None else None
+
+        # the devices have been written by another manager or process, so
+        # the validators of the own cloud response do not apply anymore
+        self._stamp = stamp
+        self._validators = {}
+
+        if entry is None:
+            self._devices = None
+            self._stored = False
+        else:
+            self._devices, self._timestamp = entry
+            self._stored = True
+
+    def set(self, devices, headers=None):
+        """
+        stores the devices obtained from the cloud in memory
+
+        :param list devices: devices as obtained from the cloud
+        :param dict headers: headers of the cloud response
+        """
+        headers = headers or {}
+        with self._lock:
+            self._devices = devices
+            self._stored = False
+            self._timestamp = time.time()
+            self._validators = dict(
+                (name, headers[key])
+                for key, name in (
+                    ("ETag", "If-None-Match"),
+                    ("Last-Modified", "If-Modified-Since"),
+                )
+                if headers.get(key)
+            )
+
+    def get_validators(self):
+        """
+        returns the headers of a conditional request for the cached devices
+        (empty, if the cloud did not return any validators)
+        """
+        with self._lock:
+            if self._devices is None:
+                return {}
+
+            return dict(self._validators)
+
+    def touch(self):
+        """
+        marks the cached devices as confirmed by the cloud, i.e. their TTL
+        starts again, and returns them
+        """
+        with self._lock:
+            self._timestamp = time.time()
+            if self._stored:
+                # let other processes know that the devices are up to date
+                self.storage.touch()
+                self._stamp = self.storage.get_stamp()
+
+            return self._devices
+
+    def save(self, devices):
+        """
+        writes the devices to the storage
+
+        :param list devices: devices as obtained from the cloud
+        """
+        with self._lock:
+            self.storage.write(devices)
+
+            self._devices = devices
+            self._stored = True
+            self._stamp = self.storage.get_stamp()
+
+
+def get_token_remaining(token):
+    """
+    returns the seconds until the given oauth token expires
+
+    :param dict token: oauth token with expires_at timestamp
+    """
+    return float(token.get("expires_at", 0)) - time.time()
+
+
+class TokenCache(object):
+    """
+    cache of the oauth tokens per client id that is persisted to a local
+    file only readable by the user, so that a token is reused by all
+    processes until it expires
+    """
+    def __init__(self, filename=TOKEN_FILENAME):
+        """
+        initiate the token cache
+
+        :param str filename: filename of the cached tokens
+        """
+        self._filename = os.path.expanduser(filename)
+        self._lock = threading.Lock()
+
+    def get(self, client_id):
+        """
+        returns the cached token of the given client id or None, if it is
+        not cached. The file is read on each call, so that tokens obtained
+        by other processes are used
+
+        :param str client_id: client id of the cloud session
+        """
+        with self._lock:
+            return self._load().get(client_id)
+
+    def set(self, client_id, token):
+        """
+        stores the token of the given client id
+
+        :param str client_id: client id of the cloud session
+        :param dict token: oauth token with expires_at timestamp
+        """
+        with self._lock:
+            tokens = self._load()
+
+            # drop expired tokens of other clients
+            tokens = dict(
+                (key, value) for key, value in tokens.items()
+                if get_token_remaining(value) > 0
+            )
+            tokens[client_id] = token
+            self._save(tokens)
+
+    def invalidate(self, client_id=None):
+        """
+        removes the token of the given client id from the cache
+
+        :param str client_id: client id of the cloud session
+                              (default: all tokens are removed)
+        """
+        with self._lock:
+            tokens = {} if client_id is None else self._load()
+            tokens.pop(client_id, None)
+            self._save(tokens)
+
+    def _load(self):
+        """
+        returns the tokens of the local file by client id
+        """
+        if not os.path.exists(self._filename):
+            return {}
+
+        try:
+            with codecs.open(self._filename, "rb", "utf-8") as f:
+                tokens = json.load(f)
+
+        except (IOError, OSError, ValueError):
+            # just ignore a corrupted or unreadable token file
+            log.debug(
+                "skipping invalid token file '{}'".format(self._filename)
+            )
+            return {}
+
+        return tokens if isinstance(tokens, dict) else {}
+
+    def _save(self, tokens):
+        """
+        writes the tokens to the local file with permissions only for
+        the user, via a temporary file so that concurrent readers never
+        see a partially written file
+
+        :param dict tokens: tokens by client id
+        """
+        log.debug("saving tokens to '{}'...".format(self._filename))
+        try:
+            # the temporary file is created with mode 0600
+            write_file(self._filename, json.dumps(tokens), ".lmtoken-")
+
+        except (IOError, OSError) as e:
+            # the cache is optional, so the token is just not reused
+            log.warning(
+                "cannot save tokens to '{}': {}".format(self._filename, e)
+            )
@@ -0,0 +1,251 @@
+import logging
+import threading
+from concurrent.futures import Future
+
+from .cache import get_device_key, check_sync_manager
+from .const import DEFAULT_COALESCE_WINDOW, DEFAULT_COALESCE_MAX_FRAMES, \
+    PRIORITIES, ICON_TYPES
+from .models import Model, Frame
+
+
+# prepare custom logger
+log = logging.getLogger(__name__)
+
+
+class _Burst(object):
+    """
+    notifications of a single device that are collected within a window
+    """
+    def __init__(self, dev):
+        self.dev = dev
+        self.notifications = []
+        self.future = Future()
+        self.timer = None
+
+    @property
+    def frame_count(self):
+        return sum(
+            len(model.frames)
+            for model, _, _, _ in self.notifications
+        )
+
+
+class NotificationCoalescer(object):
+    """
+    collects the notifications of a device within a time window and sends
+    them as a single notification whose model contains the merged frames
+    """
+    def __init__(
+        self, manager, window=DEFAULT_COALESCE_WINDOW,
+        max_frames=DEFAULT_COALESCE_MAX_FRAMES
+    ):
+        """
+        initiate the notification coalescer
+
+        :param LaMetricManager manager: manager used to send notifications
+                                        (AsyncLaMetricManager is not supported)
+        :param float window: seconds notifications of a device are collected
+                             before they are sent
+        :param int max_frames: maximum number of frames of a merged
+                               notification
+        """
+        check_sync_manager(manager)
+
+        assert(window > 0)
+        assert(max_frames > 0)
+
+        self._manager = manager
+        self._window = window
+        self._max_frames = max_frames
+
+        # bursts of notifications per device key
+        self._bursts = {}
+        self._lock = threading.Lock()
+
+    def send_notification(
+        self, model, priority="warning", icon_type=None, lifetime=None,
+        dev=None
+    ):
+        """
+        adds a notification to the burst of the device that is sent at the
+        end of the window
+
+        :param Model model: an instance of the Model class that should be used
+        :param str priority: the priority of the notification
+                             [info, warning or critical] (default: warning)
+        :param str icon_type: the icon type of the notification
+                              [none, info or alert] (default: None)
+        :param int lifetime: the lifetime of the notification in ms
+                             (default: 2 min)
+        :param dict dev: device the notification is sent to
+                         (default: the current device of the manager)
+        :return: future with the result of the merged notification
+        :rtype: concurrent.futures.Future
+        """
+        assert(priority in PRIORITIES)
+        assert(icon_type in ICON_TYPES)
+        assert((lifetime is None) or (lifetime > 0))
+
+        dev = dev or self._manager.dev
+        assert(dev is not None)
+
+        key = get_device_key(dev)
+        with self._lock:
+            burst = self._bursts.get(key)
+            if burst is None:
+                # first notification of the device starts a new window
+                burst = _Burst(dev)
+                burst.timer = threading.Timer(
+                    self._window, self._expire, args=(key, burst)
+                )
+                burst.timer.daemon = True
+                burst.timer.start()
+                self._bursts[key] = burst
+
+            burst.notifications.append((model, priority, icon_type, lifetime))
+            is_full = burst.frame_count >= self._max_frames
+
+        if is_full:
+            # no more frames fit into the notification
+            self.flush(dev)
+
+        return burst.future
+
+    def flush(self, dev=None):
+        """
+        sends the collected notifications of the given device immediately
+
+        :param dict dev: device whose notifications are sent
+                         (default: the notifications of all devices are sent)
+        """
+        with self._lock:
+            if dev is None:
+                bursts = list(self._bursts.values())
+                self._bursts = {}
+            else:
+                burst = self._bursts.pop(get_device_key(dev), None)
+                bursts = [burst] if burst is not None else []
+
+        for burst in bursts:
+            burst.timer.cancel()
+            self._send(burst)
+
+    def _expire(self, key, burst):
+        """
+        sends the given burst at the end of its window, if it has not been
+        sent already
+
+        :param str key: key of the device of the burst
+        :param _Burst burst: the burst whose window is over
+        """
+        with self._lock:
+            if self._bursts.get(key) is not burst:
+                return
+
+            del self._bursts[key]
+
+        self._send(burst)
+
+    def close(self):
+        """
+        sends all collected notifications
+        """
+        self.flush()
+
+    def _send(self, burst):
+        """
+        sends the merged notification of the given burst and sets the
+        result of its future
+
+        :param _Burst burst: the burst that should be sent
+        """
+        log.debug(
+            "sending {} coalesced notifications...".format(
+                len(burst.notifications)
+            )
+        )
+        try:
+            model, priority, icon_type, lifetime = self.merge(
+                burst.notifications
+            )
+            burst.future.set_result(
+                self._manager.send_notification(
+                    model, priority=priority, icon_type=icon_type,
+                    lifetime=lifetime, dev=burst.dev
+                )
+            )
+
+        except Exception as e:
+            burst.future.set_exception(e)
+
+    def merge(self, notifications):
+        """
+        merges the given notifications into a single notification, whose
+        model contains the frames of the notifications ordered by priority
+        and that uses the highest priority and most severe icon type. At
+        most max_frames frames are kept, even of a single notification
+
+        :param list notifications: tuples of model, priority, icon type and
+                                   lifetime of the notifications
+        :return: model, priority, icon type and lifetime of the notification
+        :rtype: tuple
+        """
+        if len(notifications) == 1:
+            model, priority, icon_type, lifetime = notifications[0]
+            if len(model.frames) <= self._max_frames:
+                return notifications[0]
+
+            # a single notification is limited like a merged one
+            log.debug(
+                "dropping {} frames of a notification...".format(
+                    len(model.frames) - self._max_frames
+                )
+            )
+            model = Model(
+                frames=model.frames[:self._max_frames], cycles=model.cycles,
+                sound=model.sound
+            )
+
+            return model, priority, icon_type, lifetime
+
+        # frames of notifications with higher priority come first
+        notifications = sorted(
+            notifications, key=lambda n: PRIORITIES.index(n[1]), reverse=True
+        )
+
+        frames = [
+            frame
+            for model, _, _, _ in notifications
+            for frame in model.frames
+            if isinstance(frame, Frame)
+        ]
+        if len(frames) > self._max_frames:
+            log.debug(
+                "dropping {} frames of coalesced notifications...".format(
+                    len(frames) - self._max_frames
+                )
+            )
+            frames = frames[:self._max_frames]
+
+        models = [model for model, _, _, _ in notifications]
+        lifetimes = [lifetime for _, _, _, lifetime in notifications]
+
+        # a model with 0 cycles is shown until it is dismissed
+        cycles = [model.cycles for model in models]
+        cycles = 0 if 0 in cycles else max(cycles)
+
+        # use the sound of the notification with the highest priority
+        sound = next(
+            (model.sound for model in models if model.sound is not None),
+            None
+        )
+
+        return (
+            Model(frames=frames, cycles=cycles, sound=sound),
+            notifications[0][1],
+            max(
+                (icon_type for _, _, icon_type, _ in notifications),
+                key=ICON_TYPES.index
+            ),
+            None if None in lifetimes else max(lifetimes)
+        )
@@ -4,6 +4,84 @@ CONFIG_FILE = "~/.lmconfig"
 # default devices filename
 DEVICES_FILENAME = "~/.lmdevices"
 
+# default filename of the database of a DeviceStore
+DEVICES_DB_FILENAME = "~/.lmdevices.db"
+
+# default filename of the cached oauth tokens
+TOKEN_FILENAME = "~/.lmtoken"
+
+# seconds before its expiry at which a token is refreshed in the background
+DEFAULT_TOKEN_REFRESH_MARGIN = 300
+
+# seconds before its expiry at which a token is no longer used
+DEFAULT_TOKEN_EXPIRY_MARGIN = 30
+
+# default filename of the cached apps of the devices
+APPS_FILENAME = "~/.lmapps"
+
+# default directory of the content-addressed store of encoded icons
+ICONS_DIRNAME = "~/.lmicons"
+
+# width and height of the icons of the device in pixels
+ICON_SIZE = 8
+
+# default maximum number of encoded icons cached in memory
+DEFAULT_ICON_CACHE_SIZE = 256
+
+# default seconds after which the cached apps of a device expire
+DEFAULT_APPS_TTL = 3600
+
+# default number of devices that are notified in parallel on a broadcast
+DEFAULT_BROADCAST_WORKERS = 16
+
+# default number of device descriptions that are downloaded in parallel
+# during discovery
+DEFAULT_DISCOVERY_WORKERS = 16
+
+# default number of device descriptions that are downloaded in parallel
+# by the SSDP listener
+DEFAULT_LISTENER_WORKERS = 4
+
+# default seconds a discovered device is valid, if its SSDP response
+# has no max-age
+DEFAULT_SSDP_MAX_AGE = 1800
+
+# default number of connections that are kept alive per device
+DEFAULT_POOL_MAXSIZE = 4
+
+# default seconds after which idle connections of a device are closed
+DEFAULT_POOL_MAX_IDLE = 300
+
+# default seconds to wait for a connection to a device or the cloud
+DEFAULT_CONNECT_TIMEOUT = 3.05
+
+# default seconds to wait for the response of a device or the cloud
+DEFAULT_READ_TIMEOUT = 10
+
+# default overall seconds a call may take including all retries
+DEFAULT_DEADLINE = 30
+
+# default seconds notifications of a device are collected before sending
+DEFAULT_COALESCE_WINDOW = 1.0
+
+# default maximum number of frames of a coalesced notification
+DEFAULT_COALESCE_MAX_FRAMES = 20
+
+# default requests per second that are sent to a device by the rate limiter
+DEFAULT_RATE_LIMIT = 2.0
+
+# default number of requests that may be sent to a device at once
+DEFAULT_RATE_BURST = 5
+
+# default maximum number of queued notifications per device of a dispatcher
+DEFAULT_DISPATCHER_QUEUE_SIZE = 100
+
+# default seconds identical notifications are suppressed after sending
+DEFAULT_DEDUP_WINDOW = 60
+
+# default maximum number of notifications remembered for deduplication
+DEFAULT_DEDUP_MAXSIZE = 1024
+
 # URLs that are applied to the cloud
 BASE_URL = "https://developer.lametric.com"
 CLOUD_URLS = {
@@ -97,6 +175,10 @@ DEVICE_URLS = {
 }
 
 
+# priorities and icon types of notifications ordered by their severity
+PRIORITIES = ("info", "warning", "critical")
+ICON_TYPES = (None, "none", "info", "alert")
+
 # available sound IDs
 SOUND_IDS = (
     "bicycle",
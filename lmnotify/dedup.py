@@ -0,0 +1,106 @@
+import time
+import hashlib
+import threading
+import collections
+
+from .cache import get_device_key
+from .const import DEFAULT_DEDUP_WINDOW, DEFAULT_DEDUP_MAXSIZE
+
+
+class DedupCache(object):
+    """
+    LRU cache of recently sent notifications that is used to suppress
+    identical notifications within a time window
+    """
+    def __init__(
+        self, window=DEFAULT_DEDUP_WINDOW, maxsize=DEFAULT_DEDUP_MAXSIZE
+    ):
+        """
+        initiate the deduplication cache
+
+        :param float window: seconds an identical notification is suppressed
+                             after it has been sent
+        :param int maxsize: maximum number of remembered notifications
+        """
+        assert(window > 0)
+        assert(maxsize > 0)
+
+        self._window = window
+        self._maxsize = maxsize
+
+        # timestamps of the sent notifications by their hash
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+        # number of suppressed notifications
+        self.suppressed = 0
+
+    @staticmethod
+    def get_key(dev, model, priority, icon_type, lifetime=None):
+        """
+        returns the canonical hash of a notification sent to a device
+
+        :param dict dev: device the notification is sent to
+        :param Model model: model of the notification
+        :param str priority: the priority of the notification
+        :param str icon_type: the icon type of the notification
+        :param int lifetime: the lifetime of the notification in ms
+        """
+        # the encoded notification is cached by the model and reused when
+        # it is sent
+        data = model.encode(priority, icon_type, lifetime)
+
+        return hashlib.sha1(
+            get_device_key(dev).encode("utf-8") + b"\0" + data
+        ).hexdigest()
+
+    def is_duplicate(self, dev, model, priority, icon_type, lifetime=None):
+        """
+        returns True, if an identical notification has been sent to the
+        device within the window, otherwise the notification is remembered
+        as sent
+
+        :param dict dev: device the notification is sent to
+        :param Model model: model of the notification
+        :param str priority: the priority of the notification
+        :param str icon_type: the icon type of the notification
+        :param int lifetime: the lifetime of the notification in ms
+        """
+        key = self.get_key(dev, model, priority, icon_type, lifetime)
+        now = time.monotonic()
+
+        with self._lock:
+            timestamp = self._entries.get(key)
+            if (timestamp is not None) and (now - timestamp < self._window):
+                self._entries.move_to_end(key)
+                self.suppressed += 1
+                return True
+
+            self._entries[key] = now
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._maxsize:
+                # forget the least recently used notification
+                self._entries.popitem(last=False)
+
+        return False
+
+    def discard(self, dev, model, priority, icon_type, lifetime=None):
+        """
+        forget a notification, e.g. because it could not be sent
+
+        :param dict dev: device the notification is sent to
+        :param Model model: model of the notification
+        :param str priority: the priority of the notification
+        :param str icon_type: the icon type of the notification
+        :param int lifetime: the lifetime of the notification in ms
+        """
+        key = self.get_key(dev, model, priority, icon_type, lifetime)
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """
+        forget all remembered notifications
+        """
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,252 @@
+import logging
+import threading
+import collections
+from concurrent.futures import Future
+
+from .cache import get_device_key, check_sync_manager
+from .const import DEFAULT_DISPATCHER_QUEUE_SIZE, PRIORITIES
+
+
+# prepare custom logger
+log = logging.getLogger(__name__)
+
+# behaviour of a full queue on submit
+OVERFLOW_BLOCK = "block"
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_LOWEST_PRIORITY = "drop_lowest_priority"
+OVERFLOW_POLICIES = (
+    OVERFLOW_BLOCK, OVERFLOW_DROP_OLDEST, OVERFLOW_DROP_LOWEST_PRIORITY
+)
+
+
+class NotificationDropped(Exception):
+    """
+    set on the future of a notification that has been dropped from a full
+    queue or that has not been sent before the dispatcher was closed
+    """
+    pass
+
+
+class _DeviceQueue(object):
+    """
+    bounded queue of the notifications of a single device that is
+    processed by its own worker thread
+    """
+    def __init__(self, dev, maxsize):
+        self.dev = dev
+        self.maxsize = maxsize
+        self.items = collections.deque()
+        self.condition = threading.Condition()
+        self.closed = False
+        self.worker = None
+
+
+class NotificationDispatcher(object):
+    """
+    dispatcher that sends notifications in the background with one worker
+    thread and one bounded queue per device
+    """
+    def __init__(
+        self, manager, maxsize=DEFAULT_DISPATCHER_QUEUE_SIZE,
+        overflow=OVERFLOW_BLOCK
+    ):
+        """
+        initiate the notification dispatcher
+
+        :param LaMetricManager manager: manager used to send notifications
+                                        (AsyncLaMetricManager is not supported)
+        :param int maxsize: maximum number of queued notifications per device
+        :param str overflow: behaviour of submit when the queue is full
+                             [block, drop_oldest, drop_lowest_priority]
+                             (default: block)
+        """
+        check_sync_manager(manager)
+
+        assert(maxsize > 0)
+        assert(overflow in OVERFLOW_POLICIES)
+
+        self._manager = manager
+        self._maxsize = maxsize
+        self._overflow = overflow
+
+        # queues per device key
+        self._queues = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _get_queue(self, dev):
+        """
+        returns the queue of the given device and starts its worker
+        (will be created on first access)
+
+        :param dict dev: device the queue is used for
+        """
+        key = get_device_key(dev)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("dispatcher has been closed")
+
+            queue = self._queues.get(key)
+            if queue is None:
+                queue = _DeviceQueue(dev, self._maxsize)
+                queue.worker = threading.Thread(
+                    target=self._work, args=(queue,),
+                    name="lmnotify-dispatcher-{}".format(key)
+                )
+                queue.worker.daemon = True
+                queue.worker.start()
+                self._queues[key] = queue
+
+        return queue
+
+    def submit(
+        self, dev, model, priority="warning", icon_type=None, lifetime=None,
+        timeout=None
+    ):
+        """
+        queues a notification for the given device without waiting for
+        the device
+
+        :param dict dev: device the notification is sent to
+        :param Model model: an instance of the Model class that should be used
+        :param str priority: the priority of the notification
+                             [info, warning or critical] (default: warning)
+        :param str icon_type: the icon type of the notification
+                              [none, info or alert] (default: None)
+        :param int lifetime: the lifetime of the notification in ms
+                             (default: 2 min)
+        :param float timeout: maximum seconds to block on a full queue,
+                              afterwards NotificationDropped is raised
+                              (only used for the block overflow)
+        :return: future with the result of the notification
+        :rtype: concurrent.futures.Future
+        """
+        assert(priority in PRIORITIES)
+
+        future = Future()
+        item = (future, model, priority, icon_type, lifetime)
+        queue = self._get_queue(dev)
+
+        dropped = None
+        with queue.condition:
+            if len(queue.items) >= queue.maxsize:
+                if self._overflow == OVERFLOW_BLOCK:
+                    if not queue.condition.wait_for(
+                        lambda: (
+                            queue.closed or
+                            (len(queue.items) < queue.maxsize)
+                        ),
+                        timeout
+                    ):
+                        raise NotificationDropped("queue is full")
+
+                elif self._overflow == OVERFLOW_DROP_OLDEST:
+                    dropped = queue.items.popleft()
+
+                else:
+                    # lowest priority that has been queued first
+                    dropped = min(
+                        queue.items, key=lambda i: PRIORITIES.index(i[2])
+                    )
+                    if (
+                        PRIORITIES.index(dropped[2]) >
+                        PRIORITIES.index(priority)
+                    ):
+                        # the new notification has the lowest priority
+                        dropped = item
+                    else:
+                        queue.items.remove(dropped)
+
+            if queue.closed:
+                raise RuntimeError("dispatcher has been closed")
+
+            if dropped is not item:
+                queue.items.append(item)
+                queue.condition.notify_all()
+
+        if (dropped is not None) and dropped[0].set_running_or_notify_cancel():
+            log.debug("dropping notification due to full queue...")
+            dropped[0].set_exception(NotificationDropped("queue is full"))
+
+        return future
+
+    def _work(self, queue):
+        """
+        sends the queued notifications of a device one after another
+
+        :param _DeviceQueue queue: the queue of the device
+        """
+        while True:
+            with queue.condition:
+                queue.condition.wait_for(
+                    lambda: queue.items or queue.closed
+                )
+                if not queue.items:
+                    # queue has been closed and is empty
+                    return
+
+                item = queue.items.popleft()
+                queue.condition.notify_all()
+
+            future, model, priority, icon_type, lifetime = item
+            if not future.set_running_or_notify_cancel():
+                continue
+
+            try:
+                future.set_result(
+                    self._manager.send_notification(
+                        model, priority=priority, icon_type=icon_type,
+                        lifetime=lifetime, dev=queue.dev
+                    )
+                )
+
+            except Exception as e:
+                future.set_exception(e)
+
+    def qsize(self, dev):
+        """
+        returns the number of queued notifications of the given device
+
+        :param dict dev: device whose queue is checked
+        """
+        with self._lock:
+            queue = self._queues.get(get_device_key(dev))
+
+        return len(queue.items) if queue is not None else 0
+
+    def close(self, wait=True, cancel_pending=False):
+        """
+        stops all workers
+
+        :param bool wait: if True, waits until the workers have finished
+        :param bool cancel_pending: if True, queued notifications are not
+                                    sent anymore
+        """
+        with self._lock:
+            self._closed = True
+            queues = list(self._queues.values())
+
+        for queue in queues:
+            with queue.condition:
+                queue.closed = True
+                pending = []
+                if cancel_pending:
+                    pending = list(queue.items)
+                    queue.items.clear()
+                queue.condition.notify_all()
+
+            for item in pending:
+                if item[0].set_running_or_notify_cancel():
+                    item[0].set_exception(
+                        NotificationDropped("dispatcher has been closed")
+                    )
+
+        if wait:
+            for queue in queues:
+                queue.worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
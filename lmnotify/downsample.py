@@ -0,0 +1,191 @@
+import array
+
+# numpy is optional, but vectorizes the downsampling of large series
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+def is_series(data):
+    """
+    returns True, if the given data can be used as series of a chart
+    i.e. a list, tuple, array.array, memoryview or numpy array
+
+    :param data: the series that should be checked
+    """
+    return (
+        isinstance(data, (list, tuple, array.array, memoryview)) or
+        hasattr(data, "__array_interface__")
+    )
+
+
+def to_list(data):
+    """
+    returns the given series as list so that it can be serialized
+
+    :param data: list, tuple, array.array, memoryview or numpy array
+    """
+    if isinstance(data, list):
+        return data
+
+    if hasattr(data, "tolist"):
+        # array.array, memoryview and numpy arrays
+        return data.tolist()
+
+    return list(data)
+
+
+def _as_array(data):
+    """
+    returns a numpy view of the given series without copying buffers
+
+    :param data: list, tuple, array.array, memoryview or numpy array
+    """
+    return numpy.asarray(data)
+
+
+def minmax(data, width):
+    """
+    downsamples the series to at most width values by keeping the minimum
+    and the maximum value of each bucket in their original order
+
+    :param data: list, tuple, array.array, memoryview or numpy array
+    :param int width: maximum number of values of the result
+    :rtype: list
+    """
+    assert(width >= 2)
+
+    n = len(data)
+    if n <= width:
+        return to_list(data)
+
+    # each bucket contributes two values
+    size = -(-n // (width // 2))
+    buckets = -(-n // size)
+
+    if numpy is not None:
+        values = _as_array(data)
+
+        # pad the last bucket with its last value, which changes neither
+        # its minimum nor its maximum
+        padded = numpy.pad(values, (0, buckets * size - n), mode="edge")
+        padded = padded.reshape(buckets, size)
+
+        rows = numpy.arange(buckets)
+        first = numpy.minimum(padded.argmin(axis=1), padded.argmax(axis=1))
+        last = numpy.maximum(padded.argmin(axis=1), padded.argmax(axis=1))
+
+        return numpy.column_stack(
+            (padded[rows, first], padded[rows, last])
+        ).ravel().tolist()
+
+    result = []
+    for start in range(0, n, size):
+        end = min(start + size, n)
+        lo = hi = start
+        for i in range(start + 1, end):
+            if data[i] < data[lo]:
+                lo = i
+            if data[i] > data[hi]:
+                hi = i
+
+        result.append(data[min(lo, hi)])
+        result.append(data[max(lo, hi)])
+
+    return result
+
+
+def lttb(data, width):
+    """
+    downsamples the series to width values with the largest triangle
+    three buckets algorithm, which keeps the visual shape of the series
+
+    :param data: list, tuple, array.array, memoryview or numpy array
+    :param int width: number of values of the result
+    :rtype: list
+    """
+    assert(width >= 3)
+
+    n = len(data)
+    if n <= width:
+        return to_list(data)
+
+    # first and last point are always kept, the others are split into
+    # buckets of equal size
+    every = (n - 2) / float(width - 2)
+
+    if numpy is not None:
+        values = _as_array(data).astype(float)
+        result = [0]
+        a = 0
+        for i in range(width - 2):
+            start = int(i * every) + 1
+            end = int((i + 1) * every) + 1
+
+            # average of the next bucket
+            next_end = min(int((i + 2) * every) + 1, n)
+            avg_x = (end + next_end - 1) / 2.0
+            avg_y = values[end:next_end].mean()
+
+            # point of the bucket with the largest triangle area
+            xs = numpy.arange(start, end)
+            areas = numpy.abs(
+                (a - avg_x) * (values[start:end] - values[a]) -
+                (a - xs) * (avg_y - values[a])
+            )
+            a = start + int(areas.argmax())
+            result.append(a)
+
+        result.append(n - 1)
+
+        return _as_array(data)[result].tolist()
+
+    result = [data[0]]
+    a = 0
+    for i in range(width - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+
+        # average of the next bucket
+        next_end = min(int((i + 2) * every) + 1, n)
+        avg_x = (end + next_end - 1) / 2.0
+        avg_y = sum(data[j] for j in range(end, next_end)) / float(
+            next_end - end
+        )
+
+        # point of the bucket with the largest triangle area
+        max_area = -1
+        for j in range(start, end):
+            area = abs(
+                (a - avg_x) * (data[j] - data[a]) -
+                (a - j) * (avg_y - data[a])
+            )
+            if area > max_area:
+                max_area, next_a = area, j
+
+        a = next_a
+        result.append(data[a])
+
+    result.append(data[n - 1])
+
+    return result
+
+
+# available downsampling methods by name
+METHODS = {
+    "minmax": minmax,
+    "lttb": lttb,
+}
+
+
+def downsample(data, width, method="minmax"):
+    """
+    downsamples the series to the given width with the given method
+
+    :param data: list, tuple, array.array, memoryview or numpy array
+    :param int width: maximum number of values of the result
+    :param str method: the downsampling method [minmax, lttb]
+    :rtype: list
+    """
+    return METHODS[method](data, width)
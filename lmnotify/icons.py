@@ -0,0 +1,183 @@
+import io
+import os
+import base64
+import struct
+import hashlib
+import logging
+import threading
+import collections
+
+from .cache import write_file
+from .const import ICONS_DIRNAME, ICON_SIZE, DEFAULT_ICON_CACHE_SIZE
+
+# Pillow is optional and only required to scale icons
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+
+# prepare custom logger
+log = logging.getLogger(__name__)
+
+# signature of PNG files
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# prefix of icons that are sent as base64 encoded PNG
+ICON_PREFIX = "data:image/png;base64,"
+
+
+def get_png_size(data):
+    """
+    returns width and height of the given PNG data or None, if the data
+    is not a PNG
+
+    :param bytes data: content of the image
+    """
+    if (data[:8] != PNG_SIGNATURE) or (data[12:16] != b"IHDR"):
+        return None
+
+    return struct.unpack(">II", data[16:24])
+
+
+class IconEncoder(object):
+    """
+    encodes images into base64 PNG icons of the size of the device icons,
+    the encoded icons are cached in memory and on disk by their content
+    """
+    def __init__(
+        self, cache_dir=ICONS_DIRNAME, maxsize=DEFAULT_ICON_CACHE_SIZE,
+        size=ICON_SIZE
+    ):
+        """
+        initiate the icon encoder
+
+        :param str cache_dir: directory of the content-addressed store of the
+                              encoded icons (None to disable the store)
+        :param int maxsize: maximum number of icons cached in memory
+        :param int size: width and height of the icons in pixels
+        """
+        assert(maxsize > 0)
+
+        self._cache_dir = (
+            os.path.expanduser(cache_dir) if cache_dir is not None else None
+        )
+        self._maxsize = maxsize
+        self._size = size
+
+        # LRU cache of the encoded icons by their content hash
+        self._icons = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, source):
+        """
+        returns the given image as icon that can be used in frames
+
+        :param source: filename or content of an image
+        :type source: str or bytes
+        :return: icon as data:image/png;base64 string
+        :rtype: str
+        """
+        if isinstance(source, bytes):
+            data = source
+        else:
+            with open(os.path.expanduser(source), "rb") as f:
+                data = f.read()
+
+        key = hashlib.sha256(
+            "{}:".format(self._size).encode("utf-8") + data
+        ).hexdigest()
+
+        with self._lock:
+            icon = self._icons.get(key)
+            if icon is not None:
+                self._icons.move_to_end(key)
+                return icon
+
+        icon = self._load(key)
+        if icon is None:
+            icon = ICON_PREFIX + base64.b64encode(
+                self._scale(data)
+            ).decode("ascii")
+            self._store(key, icon)
+
+        with self._lock:
+            self._icons[key] = icon
+            if len(self._icons) > self._maxsize:
+                # forget the least recently used icon
+                self._icons.popitem(last=False)
+
+        return icon
+
+    def _scale(self, data):
+        """
+        returns the given image as PNG of the icon size
+
+        :param bytes data: content of the image
+        """
+        if get_png_size(data) == (self._size, self._size):
+            # image can be used as it is
+            return data
+
+        if Image is None:
+            raise ImportError(
+                "Pillow is required to scale icons, please install it via "
+                "'pip install lmnotify[icons]'"
+            )
+
+        log.debug("scaling icon to {0}x{0}...".format(self._size))
+        image = Image.open(io.BytesIO(data)).convert("RGBA")
+        image = image.resize((self._size, self._size), Image.LANCZOS)
+
+        out = io.BytesIO()
+        image.save(out, format="PNG", optimize=True)
+
+        return out.getvalue()
+
+    def _get_filename(self, key):
+        """
+        returns the filename of the icon with the given content hash
+        in the store
+
+        :param str key: content hash of the image
+        """
+        return os.path.join(self._cache_dir, key[:2], key + ".txt")
+
+    def _load(self, key):
+        """
+        returns the encoded icon from the store or None, if not existing
+
+        :param str key: content hash of the image
+        """
+        if self._cache_dir is None:
+            return None
+
+        try:
+            with open(self._get_filename(key), "r") as f:
+                return f.read()
+
+        except (IOError, OSError):
+            return None
+
+    def _store(self, key, icon):
+        """
+        stores the encoded icon in the store
+
+        :param str key: content hash of the image
+        :param str icon: the encoded icon
+        """
+        if self._cache_dir is None:
+            return
+
+        filename = self._get_filename(key)
+        dirname = os.path.dirname(filename)
+        try:
+            os.makedirs(dirname, exist_ok=True)
+
+            # write to a temporary file first so that concurrent readers
+            # never see a partially written icon
+            write_file(filename, icon, ".lmicon-")
+
+        except (IOError, OSError) as e:
+            # the store is only a cache, so just skip the icon
+            log.debug("cannot store icon '{}': {}".format(filename, e))
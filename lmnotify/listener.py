@@ -0,0 +1,349 @@
+import time
+import socket
+import struct
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .const import DEFAULT_LISTENER_WORKERS
+from .ssdp import SSDPManager, SSDPResponse, SSDP_MULTICAST_ADDR, \
+    get_max_age
+
+
+# prepare custom logger
+log = logging.getLogger(__name__)
+
+# events passed to the callbacks of the listener
+DEVICE_ADDED = "added"
+DEVICE_UPDATED = "updated"
+DEVICE_REMOVED = "removed"
+
+# seconds after which the listener checks for expired devices and
+# whether it has been stopped
+POLL_INTERVAL = 1.0
+
+
+class SSDPListener(object):
+    """
+    listener that joins the SSDP multicast group and keeps a registry of
+    the devices that announce themselves via ssdp:alive and ssdp:byebye
+    """
+    def __init__(
+        self, model_name="LaMetric", ssdp_manager=None, interface="0.0.0.0",
+        timeout=2, max_workers=DEFAULT_LISTENER_WORKERS
+    ):
+        """
+        initiate the SSDP listener
+
+        :param str model_name: model name that the devices must contain
+        :param SSDPManager ssdp_manager: manager used to download and cache
+                                         the descriptions of the devices
+        :param str interface: IP address of the interface that joins the
+                              multicast group (default: any interface)
+        :param float timeout: seconds to wait for the description of a device
+        :param int max_workers: maximum number of descriptions that are
+                                downloaded in parallel
+        """
+        assert(max_workers > 0)
+
+        self._model_name = model_name
+        self._ssdp_manager = ssdp_manager or SSDPManager()
+        self._interface = interface
+        self._timeout = timeout
+        self._max_workers = max_workers
+
+        # wanted devices by usn, each with its UDN, attributes and expiry
+        self._devices = {}
+        self._pending = set()
+        self._lock = threading.Lock()
+
+        self._callbacks = []
+        self._socket = None
+        self._executor = None
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def add_callback(self, callback):
+        """
+        adds a callback that is called with the event (added, updated or
+        removed), the UDN and the attributes of a device whenever the
+        registry changes. Callbacks are called from the listener threads
+
+        :param callable callback: callback(event, udn, attrs)
+        """
+        self._callbacks.append(callback)
+
+    def remove_callback(self, callback):
+        """
+        removes a callback that has been added via add_callback
+
+        :param callable callback: the callback to remove
+        """
+        self._callbacks.remove(callback)
+
+    def get_devices(self):
+        """
+        returns a dict of the devices that are currently alive by their UDN
+        (same format as SSDPManager.get_filtered_devices)
+        """
+        with self._lock:
+            return dict(
+                (entry["udn"], dict(entry["attrs"]))
+                for entry in self._devices.values()
+            )
+
+    @property
+    def running(self):
+        """
+        returns True, if the listener has been started and not stopped
+        """
+        return (self._thread is not None) and not self._stopped.is_set()
+
+    def start(self, search=True):
+        """
+        joins the multicast group and starts listening in the background
+
+        :param bool search: if True, the devices that are already in the
+                            network are searched actively once, instead of
+                            waiting for their next announcement
+        """
+        assert(self._thread is None)
+
+        self._socket = self._create_socket()
+        self._executor = ThreadPoolExecutor(max_workers=self._max_workers)
+        self._stopped.clear()
+
+        self._thread = threading.Thread(
+            target=self._run, args=(search,), name="lmnotify-ssdp-listener"
+        )
+        self._thread.daemon = True
+        self._thread.start()
+
+    def stop(self):
+        """
+        stops listening and leaves the multicast group
+        """
+        if self._thread is None:
+            return
+
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+        self._socket.close()
+        self._socket = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    def _create_socket(self):
+        """
+        returns a UDP socket that has joined the SSDP multicast group
+        """
+        s = socket.socket(
+            socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP
+        )
+        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            # allow other SSDP listeners on the same host
+            try:
+                s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            except (OSError, socket.error):
+                pass
+
+        s.bind(("", SSDP_MULTICAST_ADDR[1]))
+        s.setsockopt(
+            socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP,
+            struct.pack(
+                "4s4s", socket.inet_aton(SSDP_MULTICAST_ADDR[0]),
+                socket.inet_aton(self._interface)
+            )
+        )
+        s.settimeout(POLL_INTERVAL)
+
+        return s
+
+    def _run(self, search):
+        """
+        receives the announcements of the devices until stopped
+
+        :param bool search: if True, the devices are searched actively first
+        """
+        if search:
+            self._search()
+
+        while not self._stopped.is_set():
+            try:
+                data = self._socket.recvfrom(65507)
+
+            except socket.timeout:
+                self._evict_expired()
+                continue
+
+            except (OSError, socket.error) as e:
+                if not self._stopped.is_set():
+                    log.warning("SSDP listener failed: {}".format(e))
+                return
+
+            try:
+                self.handle(SSDPResponse(data))
+
+            except Exception:
+                # e.g. a malformed response must not stop the listener
+                log.exception("cannot handle SSDP response")
+
+            self._evict_expired()
+
+    def _search(self):
+        """
+        searches the devices that are already in the network
+        """
+        try:
+            responses = self._ssdp_manager.discover_upnp_devices(
+                timeout=self._timeout
+            )
+
+        except (OSError, socket.error) as e:
+            log.warning("SSDP search failed: {}".format(e))
+            return
+
+        for response in responses.values():
+            try:
+                self.handle(response)
+
+            except Exception:
+                log.exception("cannot handle SSDP response")
+
+    def handle(self, response):
+        """
+        updates the registry with a search response or an announcement
+
+        :param SSDPResponse response: response or announcement of a device
+        """
+        usn = getattr(response, "usn", None)
+        if usn is None:
+            return
+
+        nts = getattr(response, "nts", "ssdp:alive")
+        if nts == "ssdp:byebye":
+            self._remove(usn)
+            return
+
+        # devices announce several services, only root devices are used
+        nt = getattr(response, "nt", getattr(response, "st", None))
+        if (nt != "upnp:rootdevice") or not getattr(
+            response, "location", None
+        ):
+            return
+
+        with self._lock:
+            entry = self._devices.get(usn)
+            if (entry is not None) and (
+                entry["location"] == response.location
+            ):
+                # known device is still alive => extend its lifetime
+                entry["expires"] = time.monotonic() + get_max_age(response)
+                return
+
+            if (usn in self._pending) or (self._executor is None):
+                return
+
+            self._pending.add(usn)
+
+        self._executor.submit(self._describe, response)
+
+    def _describe(self, response):
+        """
+        gets the description of a new or moved device and adds it to the
+        registry, if it is wanted
+
+        :param SSDPResponse response: response or announcement of a device
+        """
+        try:
+            result = self._ssdp_manager.describe_device(
+                response, self._model_name, timeout=self._timeout
+            )
+
+        except requests.exceptions.RequestException as e:
+            log.debug("skipping '{}': {}".format(response.location, e))
+            result = None
+
+        finally:
+            with self._lock:
+                self._pending.discard(response.usn)
+
+        if result is None:
+            # device is not wanted (anymore), but its description is kept
+            # cached so that it is not downloaded on each announcement
+            self._remove(response.usn, forget=False)
+            return
+
+        udn, attrs = result
+        with self._lock:
+            event = (
+                DEVICE_UPDATED if response.usn in self._devices
+                else DEVICE_ADDED
+            )
+            self._devices[response.usn] = {
+                "udn": udn,
+                "attrs": attrs,
+                "location": response.location,
+                "expires": time.monotonic() + get_max_age(response),
+            }
+
+        self._notify(event, udn, attrs)
+
+    def _remove(self, usn, forget=True):
+        """
+        removes the device with the given usn from the registry
+
+        :param str usn: unique service name of the device
+        :param bool forget: if True, the cached description is removed too
+        """
+        if forget:
+            self._ssdp_manager.forget_device(usn)
+
+        with self._lock:
+            entry = self._devices.pop(usn, None)
+
+        if entry is not None:
+            self._notify(DEVICE_REMOVED, entry["udn"], entry["attrs"])
+
+    def _evict_expired(self):
+        """
+        removes devices that have not announced themselves within their
+        max-age
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [
+                usn for usn, entry in self._devices.items()
+                if entry["expires"] <= now
+            ]
+
+        for usn in expired:
+            self._remove(usn)
+
+    def _notify(self, event, udn, attrs):
+        """
+        calls the callbacks with the change of the registry
+
+        :param str event: added, updated or removed
+        :param str udn: unique device name of the device
+        :param dict attrs: attributes of the device
+        """
+        for callback in list(self._callbacks):
+            try:
+                callback(event, udn, dict(attrs))
+
+            except Exception:
+                log.exception("SSDP listener callback failed")
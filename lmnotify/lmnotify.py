@@ -2,18 +2,25 @@
 # -*- coding: utf-8 -*-
 
 import os
-import json
-import codecs
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
-from requests.auth import HTTPBasicAuth
+from urllib3.exceptions import NewConnectionError
 
-from .const import CLOUD_URLS, DEVICE_URLS, CONFIG_FILE, DEVICES_FILENAME
+from .const import CLOUD_URLS, DEVICE_URLS, CONFIG_FILE, DEVICES_FILENAME, \
+    DEFAULT_BROADCAST_WORKERS, DEFAULT_POOL_MAXSIZE, DEFAULT_POOL_MAX_IDLE, \
+    PRIORITIES, ICON_TYPES, TOKEN_FILENAME
+from .cache import AppListCache, DeviceListCache, TokenCache
 from .config import Config
 from .models import AppModel
+from .policy import RequestPolicy, FAILURE_CONNECT, FAILURE_READ
 from .session import CloudSession, LocalSession
+from .store import DeviceFile
 from .ssdp import SSDPManager
+from .listener import SSDPListener
+from .template import NotificationTemplate
 
 
 # disable InsecureRequestWarning: Unverified HTTPS request is being made.
@@ -22,16 +29,49 @@ requests.packages.urllib3.disable_warnings()
 # prepare custom logger
 log = logging.getLogger(__name__)
 
+# headers of requests with an already encoded json body
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def get_failure(error):
+    """
+    returns FAILURE_CONNECT, if the failed request certainly has not
+    reached the server, otherwise FAILURE_READ (e.g. the connection was
+    aborted after the request has been sent or the TLS handshake failed)
+
+    :param requests.exceptions.RequestException error: error of the request
+    """
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return FAILURE_CONNECT
+
+    if isinstance(error, requests.exceptions.SSLError):
+        return FAILURE_READ
+
+    # requests wraps the error of urllib3 that contains the actual reason
+    cause = error.args[0] if error.args else None
+    if isinstance(getattr(cause, "reason", cause), NewConnectionError):
+        return FAILURE_CONNECT
+
+    return FAILURE_READ
+
 
 class LaMetricManager(object):
     """
     simple python class that allows the sending of notification
     messages to the LaMetric (https://www.lametric.com)
     """
+    # session classes used for the local and the cloud communication
+    local_session_class = LocalSession
+    cloud_session_class = CloudSession
+
     def __init__(
         self, client_id=None, client_secret=None,
         auto_create_config=False, auto_load_config=True,
-        config_filename=CONFIG_FILE, devices_filename=DEVICES_FILENAME
+        config_filename=CONFIG_FILE, devices_filename=DEVICES_FILENAME,
+        pool_maxsize=DEFAULT_POOL_MAXSIZE, pool_max_idle=DEFAULT_POOL_MAX_IDLE,
+        request_policy=None, apps_cache=None, rate_limiter=None,
+        dedup_cache=None, token_cache=None, devices_ttl=None,
+        device_store=None
     ):
         """
         initiate a LaMetricManager instance
@@ -48,6 +88,27 @@ class LaMetricManager(object):
                                       client secret are used from the config
         :param str config_filename: filename of the config file
         :param str devices_filename: filename where devices are locally stored
+        :param int pool_maxsize: maximum number of connections that are kept
+                                 alive per device
+        :param float pool_max_idle: seconds after which the connections of an
+                                    unused device are closed
+        :param RequestPolicy request_policy: policy defining timeouts and
+                                             retries of all requests
+        :param AppListCache apps_cache: cache of the installed apps per device
+                                        (default: in-memory cache)
+        :param RateLimiter rate_limiter: limits the requests per device
+                                         (default: no limit)
+        :param DedupCache dedup_cache: suppresses identical notifications
+                                       (default: no deduplication)
+        :param TokenCache token_cache: cache of the oauth token that is
+                                       shared by all processes
+                                       (default: '~/.lmtoken')
+        :param float devices_ttl: seconds after which get_devices obtains
+                                  the devices from the cloud again
+                                  (default: only if there is no local file)
+        :param DeviceStore device_store: indexed database the devices are
+                                         stored in instead of the devices
+                                         file (default: devices file)
         """
         # use provided client id and secret or if not set try to use
         # the values set by the environment variables
@@ -64,14 +125,26 @@ class LaMetricManager(object):
         )
 
         # prepare the local session for local network communication
-        self._local_session = LocalSession()
+        self._local_session = self.local_session_class(
+            pool_maxsize=pool_maxsize, max_idle=pool_max_idle
+        )
 
         # prepare the cloud session for communications with the LaMetric cloud
-        self._cloud_session = CloudSession(
+        self._cloud_session = self.cloud_session_class(
             client_id or self._config.client_id,
-            client_secret or self._config.client_secret
+            client_secret or self._config.client_secret,
+            token_cache=token_cache or TokenCache(TOKEN_FILENAME)
         )
 
+        # policy defining timeouts and retries of all requests
+        self.set_request_policy(request_policy or RequestPolicy())
+
+        # rate limiter of the requests sent to the devices
+        self.rate_limiter = rate_limiter
+
+        # cache to suppress identical notifications
+        self.dedup_cache = dedup_cache
+
         # list of devices
         self._devices = []
 
@@ -81,57 +154,136 @@ class LaMetricManager(object):
         # store the result of the last call
         self.result = None
 
-        # list of installed apps
-        self.available_apps = []
+        # list of installed apps and their index by package
+        self._set_available_apps({})
+
+        # cache of the installed apps per device
+        self._apps_cache = apps_cache or AppListCache()
+
+        # SSDP manager that caches the descriptions of discovered devices
+        self._ssdp_manager = SSDPManager()
+
+        # listener of device announcements (see start_device_listener)
+        self._listener = None
+
+        # seconds after which the devices are obtained from the cloud again
+        self._devices_ttl = devices_ttl
+
+        # indexed database of the devices (replaces the devices file)
+        self._device_store = device_store
 
         # filename where devices are stored
         self.set_devices_filename(devices_filename)
 
-    def _exec(self, cmd, url, json_data=None):
+    def set_request_policy(self, request_policy):
+        """
+        set the policy defining timeouts and retries of all requests
+
+        :param RequestPolicy request_policy: the policy that should be used
+        """
+        self.request_policy = request_policy
+
+    def _request(
+        self, session, cmd, url, policy=None, dev=None, priority=None,
+        **kwargs
+    ):
+        """
+        execute an HTTP request with the timeouts and retries of the
+        request policy and return the last response
+
+        :param requests.Session session: the session used for the request
+        :param str cmd: one of the REST commands, e.g. GET or POST
+        :param str url: URL of the request
+        :param RequestPolicy policy: policy overriding the default policy
+        :param dict dev: device whose rate limit applies to each attempt
+                         (default: requests are not limited)
+        :param str priority: priority of a notification that is used
+                             by the rate limiter
+        """
+        policy = policy or self.request_policy
+        deadline = policy.get_deadline()
+
+        attempt = 0
+        while True:
+            if (dev is not None) and (self.rate_limiter is not None):
+                # wait until the device accepts further requests
+                self.rate_limiter.acquire(dev, priority)
+
+            try:
+                res = session.request(
+                    cmd, url, timeout=policy.get_timeout(deadline), **kwargs
+                )
+                failure = res.status_code
+                error = None
+
+            except (
+                requests.exceptions.ConnectionError,
+                requests.exceptions.Timeout
+            ) as e:
+                failure, error = get_failure(e), e
+
+            delay = policy.get_retry_delay(cmd, attempt, failure, deadline)
+            if delay is None:
+                if error is not None:
+                    raise error
+
+                return res
+
+            log.debug(
+                "{} '{}' failed ({}), retrying in {:.2f}s...".format(
+                    cmd, url, failure, delay
+                )
+            )
+            time.sleep(delay)
+            attempt += 1
+
+    def _exec(
+        self, cmd, url, json_data=None, dev=None, policy=None, priority=None,
+        data=None
+    ):
         """
         execute a command at the device using the RESTful API
 
         :param str cmd: one of the REST commands, e.g. GET or POST
         :param str url: URL of the REST API the command should be applied to
         :param dict json_data: json data that should be attached to the command
+        :param dict dev: device the command is sent to
+                         (default: the current device set via set_device)
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        :param str priority: priority of a notification that is used
+                             by the rate limiter
+        :param bytes data: already encoded json body that is sent instead
+                           of the json data
         """
+        dev = dev or self.dev
+
         assert(cmd in ("GET", "POST", "PUT", "DELETE"))
-        assert(self.dev is not None)
+        assert(dev is not None)
 
         if json_data is None:
             json_data = {}
 
-        # add device address to the URL
-        url = url.format(self.dev["ipv4_internal"])
+        # get the keep-alive connection of the device that already
+        # carries the authentication
+        conn = self._local_session.get_connection(dev)
 
-        # set basic authentication
-        auth = HTTPBasicAuth("dev", self.dev["api_key"])
+        # only commands that carry a body get the json data attached
+        kwargs = {}
+        if data is not None:
+            kwargs["data"] = data
+            kwargs["headers"] = JSON_HEADERS
+        elif cmd in ("POST", "PUT"):
+            kwargs["json"] = json_data
 
         # execute HTTP request
-        res = None
-        if cmd == "GET":
-            res = self._local_session.session.get(
-                url, auth=auth, verify=False
-            )
-
-        elif cmd == "POST":
-            res = self._local_session.session.post(
-                url, auth=auth, json=json_data, verify=False
-            )
-
-        elif cmd == "PUT":
-            res = self._local_session.session.put(
-                url, auth=auth, json=json_data, verify=False
-            )
-
-        elif cmd == "DELETE":
-            res = self._local_session.session.delete(
-                url, auth=auth, verify=False
-            )
+        res = self._request(
+            conn.session, cmd, conn.url(url), policy=policy, dev=dev,
+            priority=priority, **kwargs
+        )
 
-        if res is not None:
-            # raise an exception on error
-            res.raise_for_status()
+        # raise an exception on error
+        res.raise_for_status()
 
         return res.json()
 
@@ -142,6 +294,11 @@ class LaMetricManager(object):
         :param str devices_filename: filename of the devices file
         """
         self._devices_filename = os.path.expanduser(devices_filename)
+        storage = self._device_store
+        if storage is None:
+            storage = DeviceFile(self._devices_filename)
+
+        self._devices_cache = DeviceListCache(storage, ttl=self._devices_ttl)
 
     def set_device(self, dev):
         """
@@ -163,116 +320,248 @@ class LaMetricManager(object):
         :return: id of first widget which belongs to the given package_name
         :rtype: str
         """
-        widget_id = ""
-        for app in self.get_apps_list():
-            if app.package == package_name:
-                widget_id = list(app.widgets.keys())[0]
-
-        return widget_id
+        return self._widget_ids.get(package_name, "")
 
     # ----- rest api calls on cloud ------
-    def get_user(self):
+    def get_user(self, policy=None):
         """
         get the user details via the cloud
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("getting user information from LaMetric cloud...")
-        _, url = CLOUD_URLS["get_user"]
-        res = self._cloud_session.session.get(url)
-        if res is not None:
-            # raise an exception on error
-            res.raise_for_status()
+        cmd, url = CLOUD_URLS["get_user"]
+        res = self._request(
+            self._cloud_session.session, cmd, url, policy=policy
+        )
+
+        # raise an exception on error
+        res.raise_for_status()
 
         return res.json()
 
-    def get_devices(self, force_reload=False, save_devices=True):
+    def get_devices(self, force_reload=False, save_devices=True, policy=None):
         """
         get all devices that are linked to the user, if the local device
         file is not existing the devices will be obtained from the LaMetric
-        cloud, otherwise the local device file will be read.
+        cloud, otherwise the local device file will be read. The devices are
+        kept in memory, so the file is only read again when it has been
+        modified and the cloud is only asked again after the devices TTL
+        (via a conditional request, if supported by the cloud)
 
         :param bool force_reload: When True, devices are read again from cloud
         :param bool save_devices: When True, devices obtained from the LaMetric
                                   cloud are stored locally
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        """
+        devices = self._get_cached_devices(force_reload)
+        if devices is not None:
+            return devices
+
+        # -- load devices from LaMetric cloud --
+        log.debug("getting devices from LaMetric cloud...")
+        cmd, url = CLOUD_URLS["get_devices"]
+        res = self._request(
+            self._cloud_session.session, cmd, url,
+            headers=self._devices_cache.get_validators(), policy=policy
+        )
+
+        # raise an exception on error
+        res.raise_for_status()
+
+        return self._set_cloud_devices(
+            res.status_code, res.headers,
+            res.json() if res.status_code != 304 else None, save_devices
+        )
+
+    def _get_cached_devices(self, force_reload):
         """
-        if (
-            (not os.path.exists(self._devices_filename)) or
-            (force_reload is True)
-        ):
-            # -- load devices from LaMetric cloud --
-            log.debug("getting devices from LaMetric cloud...")
-            _, url = CLOUD_URLS["get_devices"]
-            res = self._cloud_session.session.get(url)
-            if res is not None:
-                # raise an exception on error
-                res.raise_for_status()
-
-            # store obtained devices internally
-            self._devices = res.json()
-            if save_devices is True:
-                # save obtained devices to the local file
-                self.save_devices()
+        returns the devices from memory or the local devices file, or None
+        if they must be obtained from the LaMetric cloud
+
+        :param bool force_reload: When True, devices are read again from cloud
+        """
+        if force_reload is True:
+            return None
+
+        devices = self._devices_cache.get()
+        if devices is not None:
+            self._devices = devices
+
+        return devices
+
+    def _set_cloud_devices(self, status, headers, devices, save_devices):
+        """
+        stores and returns the devices of the response of the LaMetric cloud
 
+        :param int status: HTTP status of the response
+        :param dict headers: headers of the response
+        :param list devices: devices of the response (None, if not modified)
+        :param bool save_devices: When True, devices obtained from the LaMetric
+                                  cloud are stored locally
+        """
+        if status == 304:
+            log.debug("devices have not been modified")
+            self._devices = self._devices_cache.touch()
             return self._devices
 
-        else:
-            # -- load devices from local file --
-            log.debug(
-                "getting devices from '{}'...".format(self._devices_filename)
-            )
-            return self.load_devices()
+        # store obtained devices internally
+        self._devices = devices
+        self._devices_cache.set(devices, headers)
+        if save_devices is True:
+            # save obtained devices to the local file
+            self._save_devices()
+
+        return self._devices
 
     def save_devices(self):
         """
         save devices that have been obtained from LaMetric cloud
-        to a local file
+        to a local file (or the device store, if set)
+        """
+        self._save_devices()
+
+    def _save_devices(self):
+        """
+        save the devices to the local file or the device store
         """
-        log.debug("saving devices to ''...".format(self._devices_filename))
         if self._devices != []:
-            with codecs.open(self._devices_filename, "wb", "utf-8") as f:
-                json.dump(self._devices, f)
+            self._devices_cache.save(self._devices)
+
+    def find_devices(self, **keys):
+        """
+        returns the devices obtained via get_devices that match all given
+        attributes, e.g. find_devices(serial_number="SA1234567890"). If a
+        device store is set, the devices are looked up via its indexes
+
+        :param keys: values of id, name, serial_number or ipv4_internal
+        """
+        if self._device_store is not None:
+            return self._device_store.find(**keys)
+
+        return [
+            dev for dev in self._devices
+            if all(
+                str(dev.get(name)) == str(value)
+                for name, value in keys.items()
+            )
+        ]
 
     # ----- rest api calls locally on device ------
-    def get_endpoint_map(self):
+    def get_endpoint_map(self, policy=None):
         """
         returns API version and endpoint map
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("getting end points...")
         cmd, url = DEVICE_URLS["get_endpoint_map"]
-        return self._exec(cmd, url)
+        return self._exec(cmd, url, policy=policy)
 
-    def discover_devices(self):
+    def discover_devices(self, timeout=2, interfaces=None):
         """
         returns all LaMetric devices in the local network,
-        discovered via UPNP
+        discovered via UPNP (or the devices known by the device listener,
+        if it has been started)
+
+        :param float timeout: seconds to wait for replies to the discovery
+                              and for the descriptions of the devices
+        :param interfaces: IP addresses of the local interfaces the search
+                           is sent from, "all" for all interfaces or None
+                           for the default interface
         """
+        if (self._listener is not None) and self._listener.running:
+            return self._listener.get_devices()
+
         log.debug("discovering LaMetric devices via UPNP...")
-        ssdp_manager = SSDPManager()
-        return ssdp_manager.get_filtered_devices("LaMetric")
+        return self._ssdp_manager.get_filtered_devices(
+            "LaMetric", timeout=timeout, interfaces=interfaces
+        )
 
-    def load_devices(self):
+    def iter_discovered_devices(
+        self, timeout=2, expected_count=None, interfaces=None
+    ):
         """
-        load stored devices from the local file
+        generator that yields the UDN and the attributes of each LaMetric
+        device in the local network as soon as it has been discovered
+
+        :param float timeout: seconds to wait for further replies to the
+                              discovery and for the descriptions
+        :param int expected_count: if set, the discovery ends as soon as
+                                   this number of devices has been found
+        :param interfaces: IP addresses of the local interfaces the search
+                           is sent from, "all" for all interfaces or None
+                           for the default interface
         """
-        self._devices = []
-        if os.path.exists(self._devices_filename):
-            log.debug(
-                "loading devices from '{}'...".format(self._devices_filename)
+        log.debug("discovering LaMetric devices via UPNP...")
+        return self._ssdp_manager.iter_filtered_devices(
+            "LaMetric", timeout=timeout, expected_count=expected_count,
+            interfaces=interfaces
+        )
+
+    def start_device_listener(self, callback=None, interface="0.0.0.0"):
+        """
+        starts listening to the announcements of LaMetric devices in the
+        background, so that discover_devices returns the known devices
+        without sending any packets
+
+        :param callable callback: called with the event (added, updated or
+                                  removed), the UDN and the attributes of a
+                                  device whenever a device changes
+        :param str interface: IP address of the interface that joins the
+                              multicast group (default: any interface)
+        :rtype: SSDPListener
+        """
+        if self._listener is None:
+            log.debug("starting device listener...")
+            self._listener = SSDPListener(
+                "LaMetric", ssdp_manager=self._ssdp_manager,
+                interface=interface
             )
-            with codecs.open(self._devices_filename, "rb", "utf-8") as f:
-                self._devices = json.load(f)
+            if callback is not None:
+                self._listener.add_callback(callback)
+            self._listener.start()
+
+        elif callback is not None:
+            self._listener.add_callback(callback)
+
+        return self._listener
+
+    def stop_device_listener(self):
+        """
+        stops listening to the announcements of LaMetric devices
+        """
+        if self._listener is not None:
+            log.debug("stopping device listener...")
+            self._listener.stop()
+            self._listener = None
+
+    def load_devices(self):
+        """
+        load stored devices from the local file (only read again, if it
+        has been modified)
+        """
+        self._devices = self._devices_cache.load()
 
         return self._devices
 
-    def get_device_state(self):
+    def get_device_state(self, policy=None):
         """
         returns the full device state
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("getting device state...")
         cmd, url = DEVICE_URLS["get_device_state"]
-        return self._exec(cmd, url)
+        return self._exec(cmd, url, policy=policy)
 
     def send_notification(
-        self, model, priority="warning", icon_type=None, lifetime=None
+        self, model, priority="warning", icon_type=None, lifetime=None,
+        dev=None, policy=None
     ):
         """
         sends new notification to the device
@@ -284,76 +573,241 @@ class LaMetricManager(object):
                               [none, info or alert] (default: None)
         :param int lifetime: the lifetime of the notification in ms
                              (default: 2 min)
-        """
-        assert(priority in ("info", "warning", "critical"))
-        assert(icon_type in (None, "none", "info", "alert"))
-        assert((lifetime is None) or (lifetime > 0))
+        :param dict dev: device the notification is sent to
+                         (default: the current device set via set_device)
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        :return: result of the call or None, if the notification has been
+                 suppressed as duplicate
+        """
+        cmd, url, data = self._prepare_notification(
+            model, priority, icon_type, lifetime
+        )
+
+        if self._is_duplicate_notification(
+            model, priority, icon_type, lifetime, dev
+        ):
+            return None
 
         log.debug("sending notification...")
 
+        try:
+            return self._exec(
+                cmd, url, data=data, dev=dev, policy=policy,
+                priority=priority
+            )
+
+        except Exception:
+            self._forget_notification(
+                model, priority, icon_type, lifetime, dev
+            )
+            raise
+
+    def _prepare_notification(self, model, priority, icon_type, lifetime):
+        """
+        checks the parameters of a notification and prepares the
+        corresponding command, URL and json data
+
+        :param Model model: an instance of the Model class that should be used
+        :param str priority: the priority of the notification
+        :param str icon_type: the icon type of the notification
+        :param int lifetime: the lifetime of the notification in ms
+        :return: command, URL and encoded json body of the notification
+        :rtype: tuple
+        """
+        assert(priority in PRIORITIES)
+        assert(icon_type in ICON_TYPES)
+        assert((lifetime is None) or (lifetime > 0))
+
         cmd, url = DEVICE_URLS["send_notification"]
 
-        json_data = {"model": model.json(), "priority": priority}
+        return cmd, url, model.encode(priority, icon_type, lifetime)
+
+    def _is_duplicate_notification(
+        self, model, priority, icon_type, lifetime, dev
+    ):
+        """
+        returns True, if an identical notification has recently been sent
+        to the device and must be suppressed
+
+        :param Model model: an instance of the Model class that should be used
+        :param str priority: the priority of the notification
+        :param str icon_type: the icon type of the notification
+        :param int lifetime: the lifetime of the notification in ms
+        :param dict dev: device the notification is sent to
+        """
+        if self.dedup_cache is None:
+            return False
+
+        if self.dedup_cache.is_duplicate(
+            dev or self.dev, model, priority, icon_type, lifetime
+        ):
+            log.debug("suppressing duplicate notification...")
+            return True
+
+        return False
+
+    def _forget_notification(self, model, priority, icon_type, lifetime, dev):
+        """
+        removes a notification that could not be sent from the
+        deduplication cache so that it is not suppressed when resent
+
+        :param Model model: an instance of the Model class that should be used
+        :param str priority: the priority of the notification
+        :param str icon_type: the icon type of the notification
+        :param int lifetime: the lifetime of the notification in ms
+        :param dict dev: device the notification is sent to
+        """
+        if self.dedup_cache is not None:
+            self.dedup_cache.discard(
+                dev or self.dev, model, priority, icon_type, lifetime
+            )
+
+    def broadcast_notification(
+        self, devices, model, priority="warning", icon_type=None,
+        lifetime=None, max_workers=DEFAULT_BROADCAST_WORKERS, policy=None
+    ):
+        """
+        sends the same notification concurrently to multiple devices
+
+        :param list devices: devices the notification is sent to
+                             (can be obtained via get_devices function)
+        :param Model model: an instance of the Model class that should be used
+        :param str priority: the priority of the notification
+                             [info, warning or critical] (default: warning)
+        :param str icon_type: the icon type of the notification
+                              [none, info or alert] (default: None)
+        :param int lifetime: the lifetime of the notification in ms
+                             (default: 2 min)
+        :param int max_workers: maximum number of notifications that are
+                                sent in parallel
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        :return: for each device (in the same order as the given devices)
+                 either the result of the call or the raised exception
+        :rtype: list
+        """
+        assert(max_workers > 0)
+
+        log.debug(
+            "broadcasting notification to {} devices...".format(len(devices))
+        )
 
-        if icon_type is not None:
-            json_data["icon_type"] = icon_type
-        if lifetime is not None:
-            json_data["lifetime"] = lifetime
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(
+                    self.send_notification, model, priority=priority,
+                    icon_type=icon_type, lifetime=lifetime, dev=dev,
+                    policy=policy
+                )
+                for dev in devices
+            ]
 
-        return self._exec(cmd, url, json_data=json_data)
+        results = []
+        for future in futures:
+            exc = future.exception()
+            results.append(future.result() if exc is None else exc)
 
-    def get_notifications(self):
+        return results
+
+    def create_template(
+        self, model, priority="warning", icon_type=None, lifetime=None
+    ):
+        """
+        returns a template of a notification that is encoded only once,
+        so that only the values of its placeholders are substituted when
+        it is sent, e.g.
+
+        template = manager.create_template(
+            Model(frames=[SimpleFrame("i210", Placeholder("text"))])
+        )
+        template.send(text="hello")
+
+        :param Model model: model that contains frames with placeholders
+        :param str priority: the priority of the notification
+                             [info, warning or critical] (default: warning)
+        :param str icon_type: the icon type of the notification
+                              [none, info or alert] (default: None)
+        :param int lifetime: the lifetime of the notification in ms
+                             (default: 2 min)
+        :rtype: NotificationTemplate
+        """
+        return NotificationTemplate(
+            model, priority=priority, icon_type=icon_type, lifetime=lifetime,
+            manager=self
+        )
+
+    def get_notifications(self, policy=None):
         """
         returns the list of all notifications in queue
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("getting notifications in queue...")
         cmd, url = DEVICE_URLS["get_notifications_queue"]
-        return self._exec(cmd, url)
+        return self._exec(cmd, url, policy=policy)
 
-    def get_current_notification(self):
+    def get_current_notification(self, policy=None):
         """
         returns the current notification (i.e. the one that is visible)
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("getting visible notification...")
         cmd, url = DEVICE_URLS["get_current_notification"]
-        return self._exec(cmd, url)
+        return self._exec(cmd, url, policy=policy)
 
-    def get_notification(self, notification_id):
+    def get_notification(self, notification_id, policy=None):
         """
         returns a specific notification by given id
 
         :param str notification_id: the ID of the notification
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("getting notification '{}'...".format(notification_id))
         cmd, url = DEVICE_URLS["get_notification"]
-        return self._exec(cmd, url.replace(":id", notification_id))
+        return self._exec(
+            cmd, url.replace(":id", notification_id), policy=policy
+        )
 
-    def remove_notification(self, notification_id):
+    def remove_notification(self, notification_id, policy=None):
         """
         removes the given notification from queue or dismisses it, if visible
 
         :param str notification_id: the ID of the notification
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("removing notification '{}'...".format(notification_id))
         cmd, url = DEVICE_URLS["remove_notification"]
-        return self._exec(cmd, url.replace(":id", notification_id))
+        return self._exec(
+            cmd, url.replace(":id", notification_id), policy=policy
+        )
 
-    def get_display(self):
+    def get_display(self, policy=None):
         """
         returns information about the display, including
         brightness, screensaver etc.
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("getting display information...")
         cmd, url = DEVICE_URLS["get_display"]
-        return self._exec(cmd, url)
+        return self._exec(cmd, url, policy=policy)
 
-    def set_display(self, brightness=100, brightness_mode="auto"):
+    def set_display(self, brightness=100, brightness_mode="auto", policy=None):
         """
         allows to modify display state (change brightness)
 
         :param int brightness: display brightness [0, 100] (default: 100)
         :param str brightness_mode: the brightness mode of the display
                                     [auto, manual] (default: auto)
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         assert(brightness_mode in ("auto", "manual"))
         assert(brightness in range(101))
@@ -366,11 +820,11 @@ class LaMetricManager(object):
             "brightness": brightness
         }
 
-        return self._exec(cmd, url, json_data=json_data)
+        return self._exec(cmd, url, json_data=json_data, policy=policy)
 
     def set_screensaver(
         self, mode, is_mode_enabled, start_time=None, end_time=None,
-        is_screensaver_enabled=True
+        is_screensaver_enabled=True, policy=None
     ):
         """
         set the display's screensaver mode
@@ -384,6 +838,8 @@ class LaMetricManager(object):
                              (format: %H:%M:%S)
         :param bool is_screensaver_enabled: is overall screensaver turned on
                                             overrules mode specific settings
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         assert(mode in ("when_dark", "time_based"))
 
@@ -405,22 +861,27 @@ class LaMetricManager(object):
             json_data["screensaver"]["mode_params"]["start_time"] = start_time
             json_data["screensaver"]["mode_params"]["end_time"] = end_time
 
-        return self._exec(cmd, url, json_data=json_data)
+        return self._exec(cmd, url, json_data=json_data, policy=policy)
 
-    def get_volume(self):
+    def get_volume(self, policy=None):
         """
         returns the current volume
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("getting volumne...")
         cmd, url = DEVICE_URLS["get_volume"]
-        return self._exec(cmd, url)
+        return self._exec(cmd, url, policy=policy)
 
-    def set_volume(self, volume=50):
+    def set_volume(self, volume=50, policy=None):
         """
         allows to change the volume
 
         :param int volume: volume to be set for the current device
                            [0..100] (default: 50)
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         assert(volume in range(101))
 
@@ -430,19 +891,25 @@ class LaMetricManager(object):
         json_data = {
             "volume": volume,
         }
-        return self._exec(cmd, url, json_data=json_data)
+        return self._exec(cmd, url, json_data=json_data, policy=policy)
 
-    def get_bluetooth_state(self):
+    def get_bluetooth_state(self, policy=None):
         """
         returns the bluetooth state
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("getting bluetooth state...")
         cmd, url = DEVICE_URLS["get_bluetooth_state"]
-        return self._exec(cmd, url)
+        return self._exec(cmd, url, policy=policy)
 
-    def set_bluetooth(self, active=None, name=None):
+    def set_bluetooth(self, active=None, name=None, policy=None):
         """
         allows to activate/deactivate bluetooth and change the name
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         assert(active is not None or name is not None)
 
@@ -455,44 +922,98 @@ class LaMetricManager(object):
         if active is not None:
             json_data["active"] = active
 
-        return self._exec(cmd, url, json_data=json_data)
+        return self._exec(cmd, url, json_data=json_data, policy=policy)
 
-    def get_wifi_state(self):
+    def get_wifi_state(self, policy=None):
         """
         returns the current Wi-Fi state the device is connected to
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("getting wifi state...")
         cmd, url = DEVICE_URLS["get_wifi_state"]
-        return self._exec(cmd, url)
+        return self._exec(cmd, url, policy=policy)
 
     # ----- rest api calls for app control on device ------
-    def set_apps_list(self):
+    def set_apps_list(self, force_reload=False, policy=None):
         """
         gets installed apps and puts them into the available_apps list
+
+        :param bool force_reload: When True, apps are read again from the
+                                  device even if they are cached
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
-        log.debug("getting apps and setting them in the internal app list...")
+        result = None if force_reload else self._apps_cache.get(self.dev)
+        if result is None:
+            log.debug(
+                "getting apps and setting them in the internal app list..."
+            )
+            cmd, url = DEVICE_URLS["get_apps_list"]
+            result = self._exec(cmd, url, policy=policy)
+            self._apps_cache.set(self.dev, result)
 
-        cmd, url = DEVICE_URLS["get_apps_list"]
-        result = self._exec(cmd, url)
+        self._set_available_apps(result)
 
+    def invalidate_apps_list(self, dev=None):
+        """
+        removes the cached apps list so that it is obtained from the device
+        on the next access
+
+        :param dict dev: device whose apps list is removed from the cache
+                         (default: the apps lists of all devices are removed)
+        """
+        self._apps_cache.invalidate(dev)
+
+    def _set_available_apps(self, result):
+        """
+        puts the apps of the given apps list result into the available_apps
+        list
+
+        :param dict result: result of the get_apps_list call
+        """
         self.available_apps = [
             AppModel(result[app])
             for app in result
         ]
 
+        # index the apps by package (the first app of a package wins)
+        self._apps_by_package = {}
+        self._widget_ids = {}
+        self._app_actions = {}
+        for app in self.available_apps:
+            if app.package in self._apps_by_package:
+                continue
+
+            self._apps_by_package[app.package] = app
+            self._app_actions[app.package] = frozenset(app.actions)
+            if app.widgets:
+                self._widget_ids[app.package] = next(iter(app.widgets))
+
+    def get_app(self, package):
+        """
+        returns the app of the given package or None, if not installed
+
+        :param str package: name of package/app
+        """
+        return self._apps_by_package.get(package)
+
     def get_apps_list(self):
         """
         returns the list of available apps
         """
         return self.available_apps
 
-    def switch_to_app(self, package):
+    def switch_to_app(self, package, policy=None):
         """
         activates an app that is specified by package. Selects the first
         app it finds in the app list
 
         :param package: name of package/app
         :type package: str
+        :param policy: policy overriding the default policy for this call
+        :type policy: RequestPolicy
         :return: None
         :rtype: None
         """
@@ -502,29 +1023,37 @@ class LaMetricManager(object):
 
         url = url.format('{}', package, widget_id)
 
-        self.result = self._exec(cmd, url)
+        self.result = self._exec(cmd, url, policy=policy)
 
-    def switch_to_next_app(self):
+    def switch_to_next_app(self, policy=None):
         """
         switches to the next app
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("switching to next app...")
         cmd, url = DEVICE_URLS["switch_to_next_app"]
-        self.result = self._exec(cmd, url)
+        self.result = self._exec(cmd, url, policy=policy)
 
-    def switch_to_prev_app(self):
+    def switch_to_prev_app(self, policy=None):
         """
         switches to the previous app
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("switching to previous app...")
         cmd, url = DEVICE_URLS["switch_to_prev_app"]
-        self.result = self._exec(cmd, url)
+        self.result = self._exec(cmd, url, policy=policy)
 
-    def activate_widget(self, package):
+    def activate_widget(self, package, policy=None):
         """
         activate the widget of the given package
 
         :param str package: name of the package
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         cmd, url = DEVICE_URLS["activate_widget"]
 
@@ -532,9 +1061,9 @@ class LaMetricManager(object):
         widget_id = self._get_widget_id(package)
         url = url.format('{}', package, widget_id)
 
-        self.result = self._exec(cmd, url)
+        self.result = self._exec(cmd, url, policy=policy)
 
-    def _app_exec(self, package, action, params=None):
+    def _app_exec(self, package, action, params=None, policy=None):
         """
         meta method for all interactions with apps
 
@@ -544,18 +1073,42 @@ class LaMetricManager(object):
         :type action: str
         :param params: optional parameters for this action
         :type params: dict
-        :return: None
-        :rtype: None
+        :param policy: policy overriding the default policy for this call
+        :type policy: RequestPolicy
+        :return: result of the action
+        :rtype: dict
         """
-        # get list of possible commands from app.actions
-        allowed_commands = []
-        for app in self.get_apps_list():
-            if app.package == package:
-                allowed_commands = list(app.actions.keys())
-                break
+        if action not in self._get_app_actions(package):
+            # cached apps list might be outdated
+            self.set_apps_list(force_reload=True, policy=policy)
+
+        cmd, url, json_data = self._prepare_app_exec(package, action, params)
+
+        self.result = self._exec(cmd, url, json_data=json_data, policy=policy)
 
-        # check if action is in this list
-        assert(action in allowed_commands)
+        return self.result
+
+    def _get_app_actions(self, package):
+        """
+        returns the set of possible commands of the given package
+
+        :param str package: name of package/app
+        """
+        return self._app_actions.get(package, frozenset())
+
+    def _prepare_app_exec(self, package, action, params=None):
+        """
+        checks the action of an app and prepares the corresponding
+        command, URL and json data
+
+        :param str package: name of package/app
+        :param str action: the action to be executed
+        :param dict params: optional parameters for this action
+        :return: command, URL and json data of the action
+        :rtype: tuple
+        """
+        # check if action is in the list of possible commands
+        assert(action in self._get_app_actions(package))
 
         cmd, url = DEVICE_URLS["do_action"]
         # get widget id for the package
@@ -566,43 +1119,65 @@ class LaMetricManager(object):
         if params is not None:
             json_data["params"] = params
 
-        self.result = self._exec(cmd, url, json_data=json_data)
+        return cmd, url, json_data
 
-    def radio_play(self):
+    def radio_play(self, policy=None):
         """
         play the radio
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("radio => play...")
-        self._app_exec("com.lametric.radio", "radio.play")
+        return self._app_exec(
+            "com.lametric.radio", "radio.play", policy=policy
+        )
 
-    def radio_stop(self):
+    def radio_stop(self, policy=None):
         """
         stop the radio
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("radio => stop...")
-        self._app_exec("com.lametric.radio", "radio.stop")
+        return self._app_exec(
+            "com.lametric.radio", "radio.stop", policy=policy
+        )
 
-    def radio_prev(self):
+    def radio_prev(self, policy=None):
         """
         previous channel of the radio
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("radio => prev...")
-        self._app_exec("com.lametric.radio", "radio.prev")
+        return self._app_exec(
+            "com.lametric.radio", "radio.prev", policy=policy
+        )
 
-    def radio_next(self):
+    def radio_next(self, policy=None):
         """
         next channel of the radio
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("radio => next...")
-        self._app_exec("com.lametric.radio", "radio.next")
+        return self._app_exec(
+            "com.lametric.radio", "radio.next", policy=policy
+        )
 
-    def alarm_set(self, time, wake_with_radio=False):
+    def alarm_set(self, time, wake_with_radio=False, policy=None):
         """
         set the alarm clock
 
         :param str time: time of the alarm (format: %H:%M:%S)
         :param bool wake_with_radio: if True, radio will be used for the alarm
                                      instead of beep sound
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         # TODO: check for correct time format
         log.debug("alarm => set...")
@@ -611,67 +1186,107 @@ class LaMetricManager(object):
             "time": time,
             "wake_with_radio": wake_with_radio
         }
-        self._app_exec("com.lametric.clock", "clock.alarm", params=params)
+        return self._app_exec(
+            "com.lametric.clock", "clock.alarm", params=params, policy=policy
+        )
 
-    def alarm_disable(self):
+    def alarm_disable(self, policy=None):
         """
         disable the alarm
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("alarm => disable...")
         params = {"enabled": False}
-        self._app_exec("com.lametric.clock", "clock.alarm", params=params)
+        return self._app_exec(
+            "com.lametric.clock", "clock.alarm", params=params, policy=policy
+        )
 
-    def countdown_start(self):
+    def countdown_start(self, policy=None):
         """
         start the countdown
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("countdown => start...")
-        self._app_exec("com.lametric.countdown", "countdown.start")
+        return self._app_exec(
+            "com.lametric.countdown", "countdown.start", policy=policy
+        )
 
-    def countdown_pause(self):
+    def countdown_pause(self, policy=None):
         """
         pause the countdown
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("countdown => pause...")
-        self._app_exec("com.lametric.countdown", "countdown.pause")
+        return self._app_exec(
+            "com.lametric.countdown", "countdown.pause", policy=policy
+        )
 
-    def countdown_reset(self):
+    def countdown_reset(self, policy=None):
         """
         reset the countdown
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("countdown => reset...")
-        self._app_exec("com.lametric.countdown", "countdown.reset")
+        return self._app_exec(
+            "com.lametric.countdown", "countdown.reset", policy=policy
+        )
 
-    def countdown_set(self, duration, start_now):
+    def countdown_set(self, duration, start_now, policy=None):
         """
         set the countdown
 
         :param str duration:
         :param str start_now:
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("countdown => set...")
         params = {'duration': duration, 'start_now': start_now}
-        self._app_exec(
-            "com.lametric.countdown", "countdown.configure", params
+        return self._app_exec(
+            "com.lametric.countdown", "countdown.configure", params,
+            policy=policy
         )
 
-    def stopwatch_start(self):
+    def stopwatch_start(self, policy=None):
         """
         start the stopwatch
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("stopwatch => start...")
-        self._app_exec("com.lametric.stopwatch", "stopwatch.start")
+        return self._app_exec(
+            "com.lametric.stopwatch", "stopwatch.start", policy=policy
+        )
 
-    def stopwatch_pause(self):
+    def stopwatch_pause(self, policy=None):
         """
         pause the stopwatch
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("stopwatch => pause...")
-        self._app_exec("com.lametric.stopwatch", "stopwatch.pause")
+        return self._app_exec(
+            "com.lametric.stopwatch", "stopwatch.pause", policy=policy
+        )
 
-    def stopwatch_reset(self):
+    def stopwatch_reset(self, policy=None):
         """
         reset the stopwatch
+
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
         """
         log.debug("stopwatch => reset...")
-        self._app_exec("com.lametric.stopwatch", "stopwatch.reset")
+        return self._app_exec(
+            "com.lametric.stopwatch", "stopwatch.reset", policy=policy
+        )
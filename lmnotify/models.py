@@ -1,10 +1,17 @@
-from .const import SOUND_IDS, ALARM_IDS
+import json
+import weakref
+
+from .const import SOUND_IDS, ALARM_IDS, AVAILABLE_APP_PROPERTIES
+from .downsample import downsample, is_series, to_list, \
+    METHODS as DOWNSAMPLING_METHODS
 
 
 class AppModel(object):
     """
     class representing a installed app on the LaMetric
     """
+    __slots__ = tuple(AVAILABLE_APP_PROPERTIES)
+
     def __init__(self, data):
         self.actions = {}
         self.package = ''
@@ -20,19 +27,95 @@ class AppModel(object):
         set the properties of the app model by the given data dict
         """
         for property in data.keys():
-            if property in vars(self):
+            if property in self.__slots__:
                 setattr(self, property, data[property])
 
     def __repr__(self):
         return "{} ({}) V{}".format(self.package, self.vendor, self.version)
 
 
-class Frame(object):
+def serialized_property(name, doc=None):
+    """
+    returns a property that stores its value in the attribute with a
+    leading underscore and invalidates the cached serialization of the
+    object on every change
+
+    :param str name: name of the property
+    :param str doc: docstring of the property
+    """
+    attr = "_" + name
+
+    def getter(self):
+        return getattr(self, attr)
+
+    def setter(self, value):
+        setattr(self, attr, value)
+        self.invalidate()
+
+    return property(getter, setter, doc=doc)
+
+
+class Serializable(object):
+    """
+    base class of objects whose json serialization is cached until one
+    of their properties changes
+    """
+    __slots__ = ("_json", "_owners")
+
+    def __init__(self):
+        self._json = None
+
+        # containers whose serialization includes the object
+        # (will be created on first access)
+        self._owners = None
+
+    def invalidate(self):
+        """
+        drops the cached serialization (must be called after modifying
+        mutable property values in place, e.g. the data list of a chart)
+        """
+        self._json = None
+
+        if self._owners:
+            for owner in list(self._owners):
+                owner.invalidate()
+
+    def _add_owner(self, owner):
+        """
+        invalidates the given container on each change of the object
+
+        :param Serializable owner: container of the object
+        """
+        if self._owners is None:
+            self._owners = weakref.WeakSet()
+
+        self._owners.add(owner)
+
+    def json(self):
+        """
+        returns the (cached) json serializable dict of the object
+        (the dict is shared and must not be modified)
+        """
+        if self._json is None:
+            self._json = self._serialize()
+
+        return self._json
+
+    def _serialize(self):
+        """
+        returns the json serializable dict of the object
+        """
+        raise NotImplementedError
+
+
+class Frame(Serializable):
     """
     base frame class
     """
+    __slots__ = ()
+
     def __init__(self):
-        pass
+        Serializable.__init__(self)
 
 
 class SimpleFrame(Frame):
@@ -40,15 +123,20 @@ class SimpleFrame(Frame):
     simple frame that can show and icon plus text
     (icon_id or data:image/png;base64)
     """
+    __slots__ = ("_icon", "_text")
+
+    icon = serialized_property("icon")
+    text = serialized_property("text")
+
     def __init__(self, icon, text):
         Frame.__init__(self)
-        self.icon = icon
-        self.text = text
+        self._icon = icon
+        self._text = text
 
-    def json(self):
+    def _serialize(self):
         return {
-            "icon": self.icon,
-            "text": self.text,
+            "icon": self._icon,
+            "text": self._text,
         }
 
 
@@ -56,45 +144,85 @@ class GoalFrame(Frame):
     """
     goal frame that can show and icon with a goal
     """
+    __slots__ = ("_icon", "_start", "_current", "_end", "_unit")
+
+    icon = serialized_property("icon")
+    start = serialized_property("start")
+    current = serialized_property("current")
+    end = serialized_property("end")
+    unit = serialized_property("unit")
+
     def __init__(self, icon, start=0, current=0, end=100, unit="%"):
         Frame.__init__(self)
-        self.icon = icon
-        self.start = start
-        self.current = current
-        self.end = end
-        self.unit = unit
+        self._icon = icon
+        self._start = start
+        self._current = current
+        self._end = end
+        self._unit = unit
 
-    def json(self):
+    def _serialize(self):
         return {
-            "icon": self.icon,
+            "icon": self._icon,
             "goalData": {
-                "start": self.start,
-                "current": self.current,
-                "end": self.end,
-                "unit": self.unit
+                "start": self._start,
+                "current": self._current,
+                "end": self._end,
+                "unit": self._unit
             }
         }
 
 
 class SpikeChart(Frame):
     """
-    spike chart that can show a chart
+    spike chart that can show a chart of a series of values
+    (list, tuple, array.array, memoryview or numpy array)
     """
-    def __init__(self, data):
+    __slots__ = ("_data", "_width", "_method")
+
+    data = serialized_property("data")
+    width = serialized_property("width")
+    method = serialized_property("method")
+
+    def __init__(self, data, width=None, method="minmax"):
+        """
+        initiate the spike chart
+
+        :param data: values of the chart (not copied, so that large series
+                     are only converted while serializing the chart)
+        :param int width: if set, the series is downsampled to at most width
+                          values (default: None)
+        :param str method: the downsampling method [minmax, lttb]
+                           (default: minmax)
+        """
         Frame.__init__(self)
-        assert(isinstance(data, list))
-        self.data = data
+        assert(is_series(data))
+        assert((width is None) or (width >= 3))
+        assert(method in DOWNSAMPLING_METHODS)
+        self._data = data
+        self._width = width
+        self._method = method
+
+    def _serialize(self):
+        if self._width is None:
+            data = to_list(self._data)
+        else:
+            data = downsample(self._data, self._width, self._method)
 
-    def json(self):
         return {
-            "chartData": self.data,
+            "chartData": data,
         }
 
 
-class Sound(object):
+class Sound(Serializable):
     """
     a sound
     """
+    __slots__ = ("_category", "_sound_id", "_repeat")
+
+    category = serialized_property("category")
+    sound_id = serialized_property("sound_id")
+    repeat = serialized_property("repeat")
+
     def __init__(self, category, sound_id, repeat=1):
         assert(
             (category == "notifications" and (sound_id in SOUND_IDS)) or
@@ -102,55 +230,221 @@ class Sound(object):
         )
         assert(repeat > 0)
 
-        self.category = category
-        self.sound_id = sound_id
-        self.repeat = repeat
+        Serializable.__init__(self)
+        self._category = category
+        self._sound_id = sound_id
+        self._repeat = repeat
 
-    def json(self):
+    def _serialize(self):
         return {
-            "category": self.category,
-            "id": self.sound_id,
-            "repeat": self.repeat,
+            "category": self._category,
+            "id": self._sound_id,
+            "repeat": self._repeat,
         }
 
 
-class Model(object):
+class _FrameList(list):
+    """
+    list of the frames of a model that invalidates the model on each change
+    """
+    __slots__ = ("_model",)
+
+    def __init__(self, model, frames=()):
+        """
+        initiate the frame list
+
+        :param Model model: the model the frames belong to
+        :param list frames: the initial frames
+        """
+        list.__init__(self, frames)
+        self._model = weakref.ref(model)
+
+    def _changed(self, frames=()):
+        """
+        invalidates the model after the list has been modified
+
+        :param list frames: frames that have been added to the list
+        """
+        model = self._model()
+        if model is not None:
+            model._add_frames(frames)
+            model.invalidate()
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            value = list(value)
+            list.__setitem__(self, index, value)
+            self._changed(value)
+        else:
+            list.__setitem__(self, index, value)
+            self._changed([value])
+
+    def __delitem__(self, index):
+        list.__delitem__(self, index)
+        self._changed()
+
+    def __iadd__(self, frames):
+        self.extend(frames)
+        return self
+
+    def __imul__(self, count):
+        list.__imul__(self, count)
+        self._changed()
+        return self
+
+    def append(self, frame):
+        list.append(self, frame)
+        self._changed([frame])
+
+    def extend(self, frames):
+        frames = list(frames)
+        list.extend(self, frames)
+        self._changed(frames)
+
+    def insert(self, index, frame):
+        list.insert(self, index, frame)
+        self._changed([frame])
+
+    def pop(self, index=-1):
+        frame = list.pop(self, index)
+        self._changed()
+        return frame
+
+    def remove(self, frame):
+        list.remove(self, frame)
+        self._changed()
+
+    def clear(self):
+        del self[:]
+
+    def reverse(self):
+        list.reverse(self)
+        self._changed()
+
+    def sort(self, *args, **kwargs):
+        list.sort(self, *args, **kwargs)
+        self._changed()
+
+
+class Model(Serializable):
     """
     a model can consist of multiple frames and a sound
     """
+    __slots__ = ("_cycles", "_frames", "_sound", "_encoded", "__weakref__")
+
+    cycles = serialized_property("cycles")
+
+    @property
+    def frames(self):
+        """
+        frames of the model (a copy of the assigned list whose changes
+        invalidate the model)
+        """
+        return self._frames
+
+    @frames.setter
+    def frames(self, frames):
+        self._frames = _FrameList(self, frames)
+        self._add_frames(self._frames)
+        self.invalidate()
+
+    @property
+    def sound(self):
+        return self._sound
+
+    @sound.setter
+    def sound(self, sound):
+        self._sound = sound
+        if sound is not None:
+            sound._add_owner(self)
+        self.invalidate()
+
     def __init__(self, frames=None, cycles=1, sound=None):
         if frames is None:
             frames = []
         assert(cycles >= 0)
         assert(sound is None or isinstance(sound, Sound))
 
-        self.cycles = cycles
-        self.frames = frames
-        self.sound = sound
+        Serializable.__init__(self)
+        self._cycles = cycles
+        self._frames = _FrameList(self, frames)
+        self._sound = sound
+
+        # the frames and the sound invalidate the model on each change
+        self._add_frames(self._frames)
+        if sound is not None:
+            sound._add_owner(self)
+
+        # cached encoded notifications of the model
+        self._encoded = {}
+
+    def invalidate(self):
+        Serializable.invalidate(self)
+        self._encoded = {}
 
     def add_frame(self, frame):
         """
         add a single frame to the model
         """
-        self.frames.append(frame)
+        self._frames.append(frame)
 
     def add_frames(self, frames):
         """
         add a list of frames to the model
         """
+        self._frames.extend(frames)
+
+    def _add_frames(self, frames):
+        """
+        lets the given frames invalidate the model on each change
+
+        :param list frames: frames of the model
+        """
         for frame in frames:
-            self.add_frame(frame)
+            if isinstance(frame, Serializable):
+                frame._add_owner(self)
 
-    def json(self):
+    def _serialize(self):
         j = {
-            "cycles": self.cycles,
+            "cycles": self._cycles,
             "frames": [
                 frame.json()
-                for frame in self.frames
+                for frame in self._frames
                 if isinstance(frame, Frame)
             ],
         }
-        if self.sound is not None:
-            j["sound"] = self.sound.json()
+        if self._sound is not None:
+            j["sound"] = self._sound.json()
 
         return j
+
+    def encode(self, priority="warning", icon_type=None, lifetime=None):
+        """
+        returns the (cached) encoded json body of a notification with the
+        model that can be sent as-is to any number of devices
+
+        :param str priority: the priority of the notification
+        :param str icon_type: the icon type of the notification
+        :param int lifetime: the lifetime of the notification in ms
+        :rtype: bytes
+        """
+        model_json = self.json()
+
+        key = (priority, icon_type, lifetime)
+        try:
+            return self._encoded[key]
+        except KeyError:
+            pass
+
+        body = {"model": model_json, "priority": priority}
+        if icon_type is not None:
+            body["icon_type"] = icon_type
+        if lifetime is not None:
+            body["lifetime"] = lifetime
+
+        encoded = json.dumps(body, separators=(",", ":")).encode("utf-8")
+
+        # the cache may have been reset by another thread in the meantime
+        self._encoded[key] = encoded
+
+        return encoded
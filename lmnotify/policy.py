@@ -0,0 +1,172 @@
+import time
+import random
+
+from .const import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, \
+    DEFAULT_DEADLINE
+
+
+# failure types of a request that did not return a response
+FAILURE_CONNECT = "connect"
+FAILURE_READ = "read"
+
+# smallest timeout that is applied, when the deadline is (almost) reached
+MIN_TIMEOUT = 0.001
+
+# commands that can be repeated without changing the result
+IDEMPOTENT_COMMANDS = ("GET", "PUT", "DELETE")
+
+
+class RequestPolicy(object):
+    """
+    policy that defines the timeouts, the overall deadline and the retries
+    of requests sent to the devices or to the cloud
+    """
+    def __init__(
+        self, connect_timeout=DEFAULT_CONNECT_TIMEOUT,
+        read_timeout=DEFAULT_READ_TIMEOUT, deadline=DEFAULT_DEADLINE,
+        retries=2, post_retries=1, backoff_factor=0.1, max_backoff=2.0,
+        retry_statuses=(429, 500, 502, 503, 504),
+        post_retry_statuses=(429, 503)
+    ):
+        """
+        initiate the request policy
+
+        :param float connect_timeout: seconds to wait for the connection
+        :param float read_timeout: seconds to wait for the response
+        :param float deadline: overall seconds a call may take including
+                               all retries (None for no deadline). The
+                               asyncio client enforces it for the whole
+                               call, whereas the synchronous client only
+                               limits the connect and read timeout of each
+                               attempt by it, i.e. a server that keeps
+                               sending its response slowly can exceed it
+        :param int retries: number of retries of idempotent commands
+                            i.e. GET, PUT and DELETE
+        :param int post_retries: number of retries of POST commands, e.g.
+                                 notifications (only retried, when they have
+                                 certainly not been processed by the device)
+        :param float backoff_factor: base of the exponential backoff
+        :param float max_backoff: maximum seconds to wait between retries
+        :param tuple retry_statuses: status codes that cause a retry of
+                                     idempotent commands
+        :param tuple post_retry_statuses: status codes that cause a retry
+                                          of POST commands
+        """
+        assert((connect_timeout is None) or (connect_timeout > 0))
+        assert((read_timeout is None) or (read_timeout > 0))
+        assert((deadline is None) or (deadline > 0))
+        assert((retries >= 0) and (post_retries >= 0))
+
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.deadline = deadline
+        self.retries = retries
+        self.post_retries = post_retries
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.retry_statuses = retry_statuses
+        self.post_retry_statuses = post_retry_statuses
+
+    def replace(self, **kwargs):
+        """
+        returns a copy of the policy with the given values replaced,
+        e.g. policy.replace(read_timeout=1)
+        """
+        values = dict(vars(self))
+        values.update(kwargs)
+
+        return RequestPolicy(**values)
+
+    def get_deadline(self):
+        """
+        returns the timestamp at which a call that starts now must be
+        finished or None, if there is no deadline
+        """
+        if self.deadline is None:
+            return None
+
+        return time.monotonic() + self.deadline
+
+    @staticmethod
+    def get_remaining(deadline):
+        """
+        returns the seconds left until the given deadline or None, if there
+        is no deadline
+
+        :param float deadline: timestamp of the deadline
+        """
+        if deadline is None:
+            return None
+
+        return max(deadline - time.monotonic(), 0)
+
+    def get_timeout(self, deadline):
+        """
+        returns the connect and read timeout of the next attempt,
+        limited by the time that is left until the deadline
+
+        :param float deadline: timestamp of the deadline
+        :return: connect and read timeout
+        :rtype: tuple
+        """
+        remaining = self.get_remaining(deadline)
+        if remaining is None:
+            return self.connect_timeout, self.read_timeout
+
+        # timeouts must always be positive
+        remaining = max(remaining, MIN_TIMEOUT)
+
+        return (
+            min(self.connect_timeout or remaining, remaining),
+            min(self.read_timeout or remaining, remaining)
+        )
+
+    def is_retryable(self, cmd, failure):
+        """
+        returns True, if the given failure of the command can be retried
+
+        :param str cmd: one of the REST commands, e.g. GET or POST
+        :param failure: FAILURE_CONNECT, FAILURE_READ or the status code of
+                        the response
+        """
+        if cmd in IDEMPOTENT_COMMANDS:
+            return (
+                failure in (FAILURE_CONNECT, FAILURE_READ) or
+                failure in self.retry_statuses
+            )
+
+        # a POST that might have reached the device is not repeated
+        # to avoid duplicated notifications
+        return (
+            failure == FAILURE_CONNECT or
+            failure in self.post_retry_statuses
+        )
+
+    def get_retry_delay(self, cmd, attempt, failure, deadline):
+        """
+        returns the seconds to wait before the next attempt or None, if
+        the command must not be retried
+
+        :param str cmd: one of the REST commands, e.g. GET or POST
+        :param int attempt: number of the failed attempt (starting at 0)
+        :param failure: FAILURE_CONNECT, FAILURE_READ or the status code of
+                        the response
+        :param float deadline: timestamp of the deadline
+        """
+        max_retries = (
+            self.retries if cmd in IDEMPOTENT_COMMANDS else self.post_retries
+        )
+        if (attempt >= max_retries) or not self.is_retryable(cmd, failure):
+            return None
+
+        # exponential backoff with full jitter
+        delay = random.uniform(
+            0, min(self.max_backoff, self.backoff_factor * (2 ** attempt))
+        )
+
+        remaining = self.get_remaining(deadline)
+        if (remaining is not None) and (delay >= remaining):
+            # no time left for another attempt
+            return None
+
+        return delay
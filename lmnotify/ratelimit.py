@@ -0,0 +1,164 @@
+import time
+import asyncio
+import threading
+
+from .cache import get_device_key
+from .const import DEFAULT_RATE_LIMIT, DEFAULT_RATE_BURST
+
+
+class RateLimitExceeded(Exception):
+    """
+    raised, when a request is shed by the rate limiter
+    """
+    pass
+
+
+class TokenBucket(object):
+    """
+    token bucket that is refilled with a constant rate up to its capacity
+    """
+    def __init__(self, rate, capacity):
+        """
+        initiate the token bucket
+
+        :param float rate: tokens that are added per second
+        :param int capacity: maximum number of tokens i.e. the burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self._last = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(
+            self.capacity, self.tokens + (now - self._last) * self.rate
+        )
+        self._last = now
+
+    def take(self):
+        """
+        takes a token from the bucket and returns 0 or, if no token is
+        available, returns the seconds until the next token is available
+
+        :rtype: float
+        """
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0
+
+        return (1 - self.tokens) / self.rate
+
+    def force(self):
+        """
+        takes a token from the bucket, even if none is available, so that
+        the following requests have to wait longer
+        """
+        self._refill()
+        self.tokens = max(self.tokens - 1, -self.capacity)
+
+
+class RateLimiter(object):
+    """
+    rate limiter with a token bucket per device. Critical notifications
+    bypass the limit, info notifications can be shed when no token is
+    available and all other requests wait for a token
+    """
+    def __init__(
+        self, rate=DEFAULT_RATE_LIMIT, burst=DEFAULT_RATE_BURST,
+        shed_info=True, max_wait=None
+    ):
+        """
+        initiate the rate limiter
+
+        :param float rate: requests per second allowed per device
+        :param int burst: number of requests that may be sent at once
+        :param bool shed_info: if True, info notifications are rejected
+                               instead of waiting for a token
+        :param float max_wait: maximum seconds a request waits for a token
+                               before it is rejected (default: no limit)
+        """
+        assert(rate > 0)
+        assert(burst >= 1)
+
+        self._rate = rate
+        self._burst = burst
+        self._shed_info = shed_info
+        self._max_wait = max_wait
+
+        # token buckets per device key
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _get_delay(self, dev, priority, waited):
+        """
+        takes a token for the request and returns 0 or the seconds to wait
+        before trying again
+
+        :param dict dev: device the request is sent to
+        :param str priority: priority of the notification or None for
+                             other requests
+        :param float waited: seconds the request has already waited
+        """
+        key = get_device_key(dev)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = TokenBucket(self._rate, self._burst)
+                self._buckets[key] = bucket
+
+            if priority == "critical":
+                # critical notifications jump the line
+                bucket.force()
+                return 0
+
+            delay = bucket.take()
+
+        if delay > 0:
+            if (priority == "info") and self._shed_info:
+                raise RateLimitExceeded(
+                    "info notification to '{}' has been shed".format(key)
+                )
+
+            if (
+                (self._max_wait is not None) and
+                (waited + delay > self._max_wait)
+            ):
+                raise RateLimitExceeded(
+                    "no request slot for '{}' within {}s".format(
+                        key, self._max_wait
+                    )
+                )
+
+        return delay
+
+    def acquire(self, dev, priority=None):
+        """
+        blocks until a request to the given device is allowed
+
+        :param dict dev: device the request is sent to
+        :param str priority: priority of the notification or None for
+                             other requests
+        """
+        waited = 0
+        delay = self._get_delay(dev, priority, waited)
+        while delay > 0:
+            time.sleep(delay)
+            waited += delay
+            delay = self._get_delay(dev, priority, waited)
+
+    async def acquire_async(self, dev, priority=None):
+        """
+        waits until a request to the given device is allowed
+
+        :param dict dev: device the request is sent to
+        :param str priority: priority of the notification or None for
+                             other requests
+        """
+        waited = 0
+        delay = self._get_delay(dev, priority, waited)
+        while delay > 0:
+            await asyncio.sleep(delay)
+            waited += delay
+            delay = self._get_delay(dev, priority, waited)
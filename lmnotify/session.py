@@ -1,11 +1,26 @@
 import sys
+import time
+import logging
+import threading
 from abc import ABCMeta, abstractmethod
 
 import requests
+from requests.adapters import HTTPAdapter
+from requests.auth import _basic_auth_str
 from oauthlib.oauth2 import BackendApplicationClient
 from requests_oauthlib import OAuth2Session
 
-from .const import CLOUD_URLS
+from .cache import get_token_remaining
+from .const import CLOUD_URLS, DEFAULT_POOL_MAXSIZE, DEFAULT_POOL_MAX_IDLE, \
+    DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, \
+    DEFAULT_TOKEN_REFRESH_MARGIN, DEFAULT_TOKEN_EXPIRY_MARGIN
+
+
+# prepare custom logger
+log = logging.getLogger(__name__)
+
+# maximum number of formatted URLs that are cached per device
+MAX_CACHED_URLS = 64
 
 
 class Session(object):
@@ -44,6 +59,64 @@ class Session(object):
         pass
 
 
+class DeviceConnection(object):
+    """
+    keep-alive connection pool to a single LaMetric device with
+    a precomputed authentication header
+    """
+    def __init__(self, dev, pool_maxsize=DEFAULT_POOL_MAXSIZE):
+        """
+        initiate the connection pool of the device
+
+        :param dict dev: device the connection pool is used for
+        :param int pool_maxsize: maximum number of connections that are kept
+                                 alive to the device
+        """
+        self.address = dev["ipv4_internal"]
+
+        # prepare a session with a dedicated pool for the device
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        # certificate of the device is self-signed
+        self.session.verify = False
+
+        # basic authentication header is only computed once per device
+        self.session.headers["Authorization"] = _basic_auth_str(
+            "dev", dev["api_key"]
+        )
+
+        # cache of the URLs that have been formatted with the device address
+        self._urls = {}
+
+        self.last_used = time.time()
+
+    def url(self, url):
+        """
+        returns the given URL with the address of the device
+
+        :param str url: URL of the REST API
+        """
+        try:
+            return self._urls[url]
+        except KeyError:
+            formatted_url = url.format(self.address)
+
+            # do not let URLs with ids, e.g. of notifications, grow the cache
+            if len(self._urls) < MAX_CACHED_URLS:
+                self._urls[url] = formatted_url
+
+            return formatted_url
+
+    def close(self):
+        """
+        close all connections to the device
+        """
+        self.session.close()
+
+
 class LocalSession(Session):
     """
     local session that directly communicates with the LaMetric device
@@ -51,9 +124,28 @@ class LocalSession(Session):
     (note: you need to register once using CloudAuth before the local
            authentication can be used)
     """
-    def __init__(self):
+    def __init__(
+        self, pool_maxsize=DEFAULT_POOL_MAXSIZE,
+        max_idle=DEFAULT_POOL_MAX_IDLE
+    ):
+        """
+        initiate the local session
+
+        :param int pool_maxsize: maximum number of connections that are kept
+                                 alive per device
+        :param float max_idle: seconds after which the connections of an
+                               unused device are closed
+        """
         Session.__init__(self)
 
+        self._pool_maxsize = pool_maxsize
+        self._max_idle = max_idle
+
+        # registry of the connection pools per device
+        self._connections = {}
+        self._lock = threading.Lock()
+        self._next_eviction = time.time() + max_idle
+
     def init_session(self):
         """
         init the local session
@@ -66,19 +158,98 @@ class LocalSession(Session):
         """
         return True
 
+    def get_connection(self, dev):
+        """
+        returns the keep-alive connection pool of the given device
+        (will be created on first access)
+
+        :param dict dev: device the connection pool is used for
+        """
+        key = (dev["ipv4_internal"], dev["api_key"])
+        now = time.time()
+
+        with self._lock:
+            if now >= self._next_eviction:
+                self._evict_idle(now)
+
+            conn = self._connections.get(key)
+            if conn is None:
+                conn = DeviceConnection(dev, self._pool_maxsize)
+                self._connections[key] = conn
+
+            conn.last_used = now
+
+        return conn
+
+    def _evict_idle(self, now):
+        """
+        close the connection pools of devices that have not been used
+        within the maximum idle time
+
+        :param float now: current timestamp
+        """
+        for key, conn in list(self._connections.items()):
+            if now - conn.last_used > self._max_idle:
+                conn.close()
+                del self._connections[key]
+
+        self._next_eviction = now + self._max_idle / 2.0
+
+    def close(self):
+        """
+        close the connection pools of all devices
+        """
+        with self._lock:
+            for conn in self._connections.values():
+                conn.close()
+            self._connections = {}
+
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
 
 class CloudSession(Session):
     """
     cloud session that uses authentication via OAuth2 with the LaMetric Cloud
     """
     def __init__(
-        self, client_id=None, client_secret=None
+        self, client_id=None, client_secret=None, token_cache=None,
+        refresh_margin=DEFAULT_TOKEN_REFRESH_MARGIN
     ):
+        """
+        initiate the cloud session
+
+        :param str client_id: client id of the LaMetric cloud
+        :param str client_secret: client secret of the LaMetric cloud
+        :param TokenCache token_cache: cache to reuse tokens across
+                                       processes (default: no cache)
+        :param float refresh_margin: seconds before its expiry at which
+                                     the token is refreshed in the background
+        """
         Session.__init__(self)
 
+        self._token_cache = token_cache
+        self._refresh_margin = refresh_margin
+        self._refresh_lock = threading.Lock()
+        self._refreshing = False
+        self.token = None
+
         # either use given credentials or get them from env variables
         self.set_credentials(client_id, client_secret)
 
+    @property
+    def session(self):
+        """
+        property to access the session
+        (will be created on first access, its token is refreshed shortly
+        before it expires)
+        """
+        session = Session.session.fget(self)
+        self._check_token()
+
+        return session
+
     def set_credentials(self, client_id=None, client_secret=None):
         """
         set given credentials and reset the session
@@ -88,6 +259,7 @@ class CloudSession(Session):
 
         # make sure to reset session due to credential change
         self._session = None
+        self.token = None
 
     def is_configured(self):
         """
@@ -99,7 +271,8 @@ class CloudSession(Session):
         """
         init a new oauth2 session that is required to access the cloud
 
-        :param bool get_token: if True, a token will be obtained, after
+        :param bool get_token: if True, a token will be obtained (from the
+                               token cache, if still valid), after
                                the session has been created
         """
         if (self._client_id is None) or (self._client_secret is None):
@@ -115,15 +288,110 @@ class CloudSession(Session):
         )
 
         if get_token is True:
-            # get oauth token
-            self.get_token()
+            token = self._get_cached_token(DEFAULT_TOKEN_EXPIRY_MARGIN)
+            if token is not None:
+                log.debug("using cached oauth token...")
+                self._set_token(token)
+            else:
+                # get oauth token
+                self.get_token()
 
     def get_token(self):
         """
         get current oauth token
         """
-        self.token = self._session.fetch_token(
+        log.debug("getting oauth token...")
+        token = self._session.fetch_token(
             token_url=CLOUD_URLS["get_token"][1],
             client_id=self._client_id,
-            client_secret=self._client_secret
+            client_secret=self._client_secret,
+            timeout=(DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT)
         )
+        self._set_token(token)
+
+        if self._token_cache is not None:
+            self._token_cache.set(self._client_id, token)
+
+    def _set_token(self, token):
+        """
+        set the token that authenticates the requests of the session
+
+        :param dict token: oauth token with expires_at timestamp
+        """
+        self.token = token
+        self._session.token = token
+
+    def _get_cached_token(self, margin):
+        """
+        returns the cached token, if it is valid for more than the given
+        seconds or None
+
+        :param float margin: seconds the token must still be valid
+        """
+        if self._token_cache is None:
+            return None
+
+        token = self._token_cache.get(self._client_id)
+        if (token is None) or (get_token_remaining(token) <= margin):
+            return None
+
+        return token
+
+    def _check_token(self):
+        """
+        renews an expired token and refreshes a token that expires soon
+        in the background
+        """
+        if (self.token is None) or ("expires_at" not in self.token):
+            return
+
+        remaining = get_token_remaining(self.token)
+        if remaining <= DEFAULT_TOKEN_EXPIRY_MARGIN:
+            # token is not usable anymore => renew it now
+            with self._refresh_lock:
+                if get_token_remaining(self.token) <= (
+                    DEFAULT_TOKEN_EXPIRY_MARGIN
+                ):
+                    self._refresh()
+
+        elif remaining <= self._refresh_margin:
+            with self._refresh_lock:
+                if self._refreshing:
+                    return
+                self._refreshing = True
+
+            thread = threading.Thread(
+                target=self._refresh_in_background,
+                name="lmnotify-token-refresh"
+            )
+            thread.daemon = True
+            thread.start()
+
+    def _refresh(self):
+        """
+        uses a token that another process has obtained meanwhile or
+        gets a new token
+        """
+        token = self._get_cached_token(self._refresh_margin)
+        if (token is not None) and (
+            token.get("expires_at") != self.token.get("expires_at")
+        ):
+            log.debug("using oauth token refreshed by another process...")
+            self._set_token(token)
+        else:
+            self.get_token()
+
+    def _refresh_in_background(self):
+        """
+        refreshes the token while the current token is still used
+        """
+        try:
+            self._refresh()
+
+        except Exception as e:
+            # the token is renewed on the next request, if it expires
+            log.warning("cannot refresh oauth token: {}".format(e))
+
+        finally:
+            with self._refresh_lock:
+                self._refreshing = False
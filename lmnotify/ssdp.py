@@ -1,16 +1,250 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
-import collections
+import re
+import sys
+import time
+import select
 import socket
+import struct
+import logging
+import threading
+import collections
 import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 import requests
+from requests.adapters import HTTPAdapter
+
+# fcntl is only available on unix and used to get the interface addresses
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from .const import DEFAULT_DISCOVERY_WORKERS, DEFAULT_SSDP_MAX_AGE
+from .policy import MIN_TIMEOUT
 
 
+# prepare custom logger
+log = logging.getLogger(__name__)
+
 #  SSDP multicast address for device discovery
 SSDP_MULTICAST_ADDR = ("239.255.255.250", 1900)
 
+# seconds after which a streaming discovery checks for descriptions that
+# have been downloaded meanwhile
+STREAM_POLL_INTERVAL = 0.05
+
+# XML namespace of UPNP device descriptions
+UPNP_NS = {"upnp": "urn:schemas-upnp-org:device-1-0"}
+
+# tags of the description in the UPNP namespace
+UPNP_PREFIX = "{%s}" % UPNP_NS["upnp"]
+UPNP_DEVICE_TAG = UPNP_PREFIX + "device"
+UPNP_URL_BASE_TAG = UPNP_PREFIX + "URLBase"
+
+# number of bytes of a description that are parsed at once
+DESCRIPTION_CHUNK_SIZE = 512
+
+# attributes of the device description that are kept
+DEVICE_ATTRIBUTES = (
+    "deviceType", "friendlyName", "manufacturer", "manufacturerURL",
+    "modelDescription", "modelName", "modelNumber"
+)
+
+
+# pattern of the max-age directive of the cache-control header
+MAX_AGE_PATTERN = re.compile(r"max-age\s*=\s*(\d+)", re.IGNORECASE)
+
+
+def get_max_age(response):
+    """
+    returns the seconds the device of the SSDP response is valid according
+    to its cache-control header
+
+    :param SSDPResponse response: response of the device
+    """
+    match = MAX_AGE_PATTERN.search(getattr(response, "cache-control", ""))
+    if match is None:
+        return DEFAULT_SSDP_MAX_AGE
+
+    return int(match.group(1))
+
+
+# ioctl request to get the IPv4 address of an interface (linux)
+SIOCGIFADDR = 0x8915
+
+
+def get_interface_addresses():
+    """
+    returns the IPv4 addresses of all local interfaces except loopback
+
+    :rtype: list
+    """
+    addresses = []
+    if (fcntl is not None) and hasattr(socket, "if_nameindex"):
+        s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            for _, name in socket.if_nameindex():
+                try:
+                    addresses.append(socket.inet_ntoa(fcntl.ioctl(
+                        s.fileno(), SIOCGIFADDR,
+                        struct.pack("256s", name[:15].encode("utf-8"))
+                    )[20:24]))
+                except (OSError, IOError):
+                    # interface without IPv4 address
+                    pass
+        finally:
+            s.close()
+
+    if not addresses:
+        # fall back to the addresses of the host name
+        try:
+            addresses = socket.gethostbyname_ex(socket.gethostname())[2]
+        except (OSError, socket.error):
+            pass
+
+    return sorted(set(
+        address for address in addresses if not address.startswith("127.")
+    ))
+
+
+class DeviceDescriptionParser(object):
+    """
+    incremental parser of the XML description of a UPNP device that stops
+    as soon as the model name is known not to match or all wanted
+    attributes of the device have been read
+    """
+    def __init__(self, model_name):
+        """
+        initiate the parser
+
+        :param str model_name: model name that must be contained
+        """
+        self._model_name = model_name
+        self._parser = ET.XMLPullParser(events=("start", "end"))
+        self._depth = 0
+        self._in_device = False
+        self._device_read = False
+        self._matches = False
+        self._udn = None
+        self._attrs = {}
+
+        # True, as soon as the result is known
+        self.done = False
+
+    def feed(self, data):
+        """
+        parses the next chunk of the description and returns True, if the
+        rest of the description is not needed anymore
+
+        :param data: the next chunk of the description
+        :type data: bytes or str
+        """
+        if self.done:
+            return True
+
+        self._parser.feed(data)
+        for event, elem in self._parser.read_events():
+            if event == "start":
+                self._depth += 1
+                if (self._depth == 2) and (elem.tag == UPNP_DEVICE_TAG):
+                    # root device i.e. not one of its embedded devices
+                    self._in_device = True
+                continue
+
+            depth = self._depth
+            self._depth -= 1
+
+            if (depth == 3) and self._in_device:
+                self._add_attribute(elem)
+            elif depth == 2:
+                if elem.tag == UPNP_URL_BASE_TAG:
+                    self._attrs["URLBase"] = elem.text
+                    self.done = self._device_read
+                elif elem.tag == UPNP_DEVICE_TAG:
+                    # the URL base may still follow the device
+                    self._in_device = False
+                    self._device_read = True
+                    self.done = (
+                        (not self._matches) or (self._udn is None) or
+                        ("URLBase" in self._attrs)
+                    )
+            elif depth == 1:
+                self.done = True
+
+            if depth >= 3:
+                # free the elements that have been read
+                elem.clear()
+
+            if self.done:
+                break
+
+        return self.done
+
+    def _add_attribute(self, elem):
+        """
+        adds the attribute of the device of the given element
+
+        :param Element elem: child element of the device element
+        """
+        if not elem.tag.startswith(UPNP_PREFIX):
+            return
+
+        name = elem.tag[len(UPNP_PREFIX):]
+        text = elem.text
+        if name == "UDN":
+            self._udn = text
+        elif (name in DEVICE_ATTRIBUTES) and (text is not None):
+            self._attrs[name] = text.strip()
+
+        if name == "modelName":
+            self._matches = self._model_name in (text or "")
+            if not self._matches:
+                # model name is not wanted => skip the rest
+                self.done = True
+
+        elif (
+            self._matches and (self._udn is not None) and
+            ("URLBase" in self._attrs) and
+            all(attr in self._attrs for attr in DEVICE_ATTRIBUTES)
+        ):
+            # all wanted attributes are known (the URL base usually
+            # precedes the device)
+            self.done = True
+
+    def close(self):
+        """
+        finishes the parsing and returns the UDN and the attributes of the
+        device or None, if the model name is not wanted
+
+        :rtype: tuple
+        """
+        if not self.done:
+            # raises a ParseError, if the description is incomplete
+            self._parser.close()
+
+        if (not self._matches) or (self._udn is None):
+            return None
+
+        return self._udn, self._attrs
+
+
+def parse_device_description(text, model_name):
+    """
+    parses the XML description of a UPNP device and returns its unique
+    UDN and its attributes or None, if the model name is not wanted
+
+    :param str text: XML description of the device
+    :param str model_name: model name that must be contained
+    :rtype: tuple
+    """
+    parser = DeviceDescriptionParser(model_name)
+    parser.feed(text)
+
+    return parser.close()
+
 
 class SSDPDiscoveryMessage(object):
     """
@@ -47,138 +281,841 @@ class SSDPDiscoveryMessage(object):
         return self.bytes.decode("utf-8")
 
 
-class SSDPResponse(object):
+# headers of SSDP messages that are stored in slots, other headers are
+# stored in a dict that is only created when needed
+SSDP_HEADERS = (
+    "cache-control", "date", "ext", "host", "location", "man", "mx", "nt",
+    "nts", "server", "st", "usn"
+)
+
+# slot names by header name
+_HEADER_SLOTS = dict(
+    (name, name.replace("-", "_")) for name in SSDP_HEADERS
+)
+
+# names of all slots of the headers and responses
+_SLOTS = frozenset(_HEADER_SLOTS.values()).union(("addr",))
+
+# value of slots whose header is not set
+_MISSING = object()
+
+
+class SSDPHeaders(object):
+    """
+    case-insensitive mapping of the headers of an SSDP message
+    """
+    __slots__ = tuple(_HEADER_SLOTS.values()) + ("_extra",)
+
+    def __init__(self, headers=None):
+        """
+        initiate the headers
+
+        :param dict headers: initial headers by their name
+        """
+        self._extra = None
+        if headers:
+            for key, value in headers.items():
+                self[key] = value
+
+    def __setitem__(self, key, value):
+        key = key.lower()
+        slot = _HEADER_SLOTS.get(key)
+        if slot is not None:
+            setattr(self, slot, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __getitem__(self, key):
+        key = key.lower()
+        slot = _HEADER_SLOTS.get(key)
+        if slot is not None:
+            value = getattr(self, slot, _MISSING)
+            if value is not _MISSING:
+                return value
+
+        elif self._extra is not None:
+            return self._extra[key]
+
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        try:
+            self[key]
+        except KeyError:
+            return False
+
+        return True
+
+    def __iter__(self):
+        for name, slot in _HEADER_SLOTS.items():
+            if getattr(self, slot, _MISSING) is not _MISSING:
+                yield name
+
+        if self._extra is not None:
+            for name in self._extra:
+                yield name
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def items(self):
+        return [(name, self[name]) for name in self]
+
+    def __repr__(self):
+        return "SSDPHeaders({!r})".format(dict(self.items()))
+
+
+# header names and slots by their raw name, so that the names are shared
+# by all messages
+_HEADER_NAMES = {}
+
+# values of headers with few distinct values, so that they are shared
+# by all messages
+_HEADER_VALUES = {}
+
+# headers whose values are shared by all messages
+SHARED_HEADERS = frozenset((
+    "cache-control", "ext", "man", "mx", "nt", "nts", "server", "st"
+))
+
+# maximum number of cached header names and values
+MAX_SHARED = 256
+
+
+def _get_header_name(key):
+    """
+    returns the shared name of the header with the given raw name, its
+    slot (None, if the header is not stored in a slot) and whether its
+    values are shared or None, if the name is empty
+
+    :param str key: raw name of the header
+    :rtype: tuple
+    """
+    name = key.strip().lower()
+    if not name:
+        return None
+
+    name = sys.intern(name)
+    header = (name, _HEADER_SLOTS.get(name), name in SHARED_HEADERS)
+    if len(_HEADER_NAMES) < MAX_SHARED:
+        _HEADER_NAMES[key] = header
+
+    return header
+
+
+def _get_shared_value(value):
+    """
+    returns the shared instance of a header value
+
+    :param str value: stripped value of the header
+    """
+    shared = _HEADER_VALUES.get(value)
+    if shared is None:
+        if len(_HEADER_VALUES) < MAX_SHARED:
+            _HEADER_VALUES[value] = value
+        return value
+
+    return shared
+
+
+def parse_message(data, headers=None, start_lines=None):
+    """
+    parses the raw bytes of an SSDP message and returns its start line
+    and its headers. Lines without colon are skipped and invalid
+    characters are replaced, so that a malformed message never raises
+
+    :param bytes data: the received datagram
+    :param SSDPHeaders headers: headers that are updated (default: new)
+    :param tuple start_lines: if set, the headers are only parsed, if the
+                              message starts with one of these lines
+    :rtype: tuple
+    """
+    if headers is None:
+        headers = SSDPHeaders()
+
+    # the start line is checked on the raw bytes, so that other messages
+    # are skipped without decoding them
+    end = data.find(b"\n")
+    start_line = (data if end == -1 else data[:end]).strip()
+    if (
+        (end == -1) or
+        ((start_lines is not None) and (start_line not in start_lines))
+    ):
+        return start_line, headers
+
+    lines = data.decode("utf-8", "replace").split("\n")
+    names = _HEADER_NAMES
+    for i in range(1, len(lines)):
+        key, sep, value = lines[i].partition(":")
+        if not sep:
+            if not key.strip():
+                # empty line terminates the headers
+                break
+            continue
+
+        header = names.get(key)
+        if header is None:
+            header = _get_header_name(key)
+            if header is None:
+                continue
+
+        name, slot, shared = header
+        value = value.strip()
+        if shared:
+            value = _get_shared_value(value)
+
+        if slot is not None:
+            setattr(headers, slot, value)
+        else:
+            headers[name] = value
+
+    return start_line, headers
+
+
+# start lines of SSDP messages that describe a device
+SSDP_START_LINES = (b"HTTP/1.1 200 OK", b"NOTIFY * HTTP/1.1")
+
+
+class SSDPResponse(SSDPHeaders):
     """
     SSDP reponse message that parses the result of
-    an SSDP discovery message and set it as properties
+    an SSDP discovery message (or an SSDP announcement
+    of a device) and provides its headers as properties
     """
+    __slots__ = ("addr",)
+
     def __init__(self, data):
+        SSDPHeaders.__init__(self)
         self._parse(data)
 
     def _parse(self, response):
         # get data and IP address of response
-        data, addr = response
+        data, self.addr = response
 
-        # decode the data and split it into lines
-        lines = data.decode("utf-8").strip().split("\r\n")
+        # only use the headers, if request was successful
+        parse_message(data, self, SSDP_START_LINES)
 
-        if lines.pop(0) == "HTTP/1.1 200 OK":
-            # if request was successful, parse lines and set attributes
-            for line in lines:
-                key, value = line.split(":", 1)
-                setattr(self, key.lower(), value.strip())
+    def __getattr__(self, name):
+        # only called for headers that are not set or that are no valid
+        # identifiers e.g. cache-control
+        if name.startswith("_") or (name in _SLOTS):
+            raise AttributeError(name)
+
+        try:
+            return self[name]
+        except KeyError:
+            raise AttributeError(name)
 
     def __str__(self):
-        return str(self.__dict__)
+        return str(dict(self.items()))
 
 
 class SSDPManager(object):
     """
     SSDP Manager to discover UPNP devices in the network
     """
+    def __init__(self, max_workers=DEFAULT_DISCOVERY_WORKERS, interfaces=None):
+        """
+        initiate the SSDP manager
+
+        :param int max_workers: maximum number of device descriptions that
+                                are downloaded in parallel
+        :param interfaces: IP addresses of the local interfaces the searches
+                           are sent from, "all" for all interfaces or None
+                           for the default interface
+        """
+        assert(max_workers > 0)
+
+        self._max_workers = max_workers
+        self._interfaces = interfaces
+        self._session = None
+
+        # cached descriptions of the discovered devices by their usn
+        self._descriptions = {}
+        self._lock = threading.Lock()
 
     def discover_upnp_devices(
-        self, st="upnp:rootdevice", timeout=2, mx=1, retries=1
+        self, st="upnp:rootdevice", timeout=2, mx=1, retries=1,
+        interfaces=None, mx_step=0, deadline=None
     ):
         """
-        sends an SSDP discovery packet to the network and collects
-        the devices that replies to it. A dictionary is returned
+        sends SSDP discovery packets to the network and collects
+        the devices that reply to them. A dictionary is returned
         using the devices unique usn as key
+
+        :param str st: search target of the discovery
+        :param float timeout: seconds to wait for further replies
+        :param int mx: maximum seconds the devices delay their replies
+        :param int retries: number of discovery packets sent per interface,
+                            the replies of all retries are merged
+        :param interfaces: IP addresses of the local interfaces the packets
+                           are sent from, "all" for all interfaces or None
+                           for the interfaces of the manager
+        :param int mx_step: increase of mx for each retry, so that the
+                            replies of large networks are spread over a
+                            longer period
+        :param float deadline: maximum seconds to wait for replies
+                               including all retries (default: no limit)
         """
-        # prepare UDP socket to transfer the SSDP packets
-        s = socket.socket(
-            socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP
-        )
-        s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        s.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
-        s.settimeout(timeout)
+        assert(retries > 0)
+
+        end = None if deadline is None else time.monotonic() + deadline
+
+        addresses = self._get_addresses(interfaces)
+        if len(addresses) == 1:
+            return self._search(
+                addresses[0], st, timeout, mx, retries, mx_step, end
+            )
+
+        # search on all interfaces in parallel and merge the replies
+        devices = {}
+        with ThreadPoolExecutor(max_workers=len(addresses)) as executor:
+            for result in executor.map(
+                lambda address: self._search(
+                    address, st, timeout, mx, retries, mx_step, end
+                ),
+                addresses
+            ):
+                devices.update(result)
+
+        return devices
+
+    def _search(self, address, st, timeout, mx, retries, mx_step, end=None):
+        """
+        sends SSDP discovery packets from the given interface and returns
+        the replies by the devices unique usn
+
+        :param str address: IP address of the interface or None for the
+                            default interface
+        :param str st: search target of the discovery
+        :param float timeout: seconds to wait for further replies
+        :param int mx: maximum seconds the devices delay their replies
+        :param int retries: number of discovery packets sent
+        :param int mx_step: increase of mx for each retry
+        :param float end: monotonic time after which no further replies
+                          are awaited (default: no limit)
+        """
+        try:
+            # prepare UDP socket to transfer the SSDP packets
+            s = self._create_socket(timeout, address)
 
-        # prepare SSDP discover message
-        msg = SSDPDiscoveryMessage(mx=mx, st=st)
+        except (OSError, socket.error) as e:
+            log.warning(
+                "cannot search on interface '{}': {}".format(address, e)
+            )
+            return {}
 
         # try to get devices with multiple retries in case of failure
         devices = {}
-        for _ in range(retries):
-            # send SSDP discovery message
-            s.sendto(msg.bytes, SSDP_MULTICAST_ADDR)
+        try:
+            for i in range(retries):
+                if (end is not None) and (time.monotonic() >= end):
+                    break
 
-            devices = {}
-            try:
+                # send SSDP discovery message
+                msg = SSDPDiscoveryMessage(mx=mx + i * mx_step, st=st)
+                s.sendto(msg.bytes, SSDP_MULTICAST_ADDR)
+
+                # wait at least for the maximum delay of the replies and
+                # until no device has replied within the timeout
+                sent = last = time.monotonic()
                 while True:
-                    # parse response and store it in dict
-                    r = SSDPResponse(s.recvfrom(65507))
-                    devices[r.usn] = r
+                    until = max(sent + msg.mx, last + timeout)
+                    if end is not None:
+                        until = min(until, end)
 
-            except socket.timeout:
-                break
+                    remaining = until - time.monotonic()
+                    if remaining <= 0:
+                        break
+
+                    s.settimeout(remaining)
+                    try:
+                        data = s.recvfrom(65507)
+                    except socket.timeout:
+                        break
+
+                    last = time.monotonic()
+
+                    # parse response and store it in dict (malformed
+                    # replies have no usn)
+                    r = SSDPResponse(data)
+                    if getattr(r, "usn", None) is not None:
+                        devices[r.usn] = r
+
+        finally:
+            s.close()
 
         return devices
 
+    def _get_addresses(self, interfaces):
+        """
+        returns the IP addresses of the interfaces to search on
+
+        :param interfaces: IP addresses of the local interfaces, "all" for
+                           all interfaces or None for the interfaces of
+                           the manager
+        :rtype: list
+        """
+        if interfaces is None:
+            interfaces = self._interfaces
+
+        if interfaces is None:
+            # default interface
+            return [None]
+
+        if interfaces == "all":
+            return get_interface_addresses() or [None]
+
+        return list(interfaces) or [None]
+
+    def _create_socket(self, timeout, address=None):
+        """
+        returns a UDP socket to transfer the SSDP packets
+
+        :param float timeout: seconds to wait for replies
+        :param str address: IP address of the interface the packets are
+                            sent from (default: the default interface)
+        """
+        s = socket.socket(
+            socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP
+        )
+        try:
+            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            s.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, 2)
+            if address is not None:
+                s.setsockopt(
+                    socket.IPPROTO_IP, socket.IP_MULTICAST_IF,
+                    socket.inet_aton(address)
+                )
+                s.bind((address, 0))
+            s.settimeout(timeout)
+
+        except (OSError, socket.error):
+            s.close()
+            raise
+
+        return s
+
+    def iter_filtered_devices(
+        self, model_name, device_types="upnp:rootdevice", timeout=2, mx=1,
+        expected_count=None, interfaces=None
+    ):
+        """
+        generator that yields the UDN and the attributes of each device
+        that contains the given model name as soon as its reply and its
+        description have been received
+
+        :param str model_name: model name that must be contained
+        :param str device_types: search target of the discovery
+        :param float timeout: seconds to wait for further replies to the
+                              discovery and for each description
+        :param int mx: maximum seconds the devices delay their replies
+        :param int expected_count: if set, the discovery ends as soon as
+                                   this number of devices has been found
+        :param interfaces: IP addresses of the local interfaces the search
+                           is sent from, "all" for all interfaces or None
+                           for the interfaces of the manager
+        """
+        assert((expected_count is None) or (expected_count > 0))
+
+        sockets = []
+        for address in self._get_addresses(interfaces):
+            try:
+                sockets.append(self._create_socket(0, address))
+            except (OSError, socket.error) as e:
+                log.warning(
+                    "cannot search on interface '{}': {}".format(address, e)
+                )
+
+        executor = ThreadPoolExecutor(max_workers=self._max_workers)
+        pending = []
+        usns = set()
+        found = set()
+        try:
+            msg = SSDPDiscoveryMessage(mx=mx, st=device_types)
+            for s in sockets:
+                s.sendto(msg.bytes, SSDP_MULTICAST_ADDR)
+
+            # replies are received until no device has replied within the
+            # timeout, afterwards only the pending descriptions are awaited
+            receive_until = time.monotonic() + max(mx, timeout)
+            while True:
+                now = time.monotonic()
+                if sockets and (now < receive_until):
+                    readable = select.select(
+                        sockets, [], [], STREAM_POLL_INTERVAL
+                    )[0]
+                    for s in readable:
+                        try:
+                            r = SSDPResponse(s.recvfrom(65507))
+
+                        except socket.error:
+                            continue
+
+                        usn = getattr(r, "usn", None)
+                        if (
+                            (usn is not None) and (usn not in usns) and
+                            getattr(r, "location", None)
+                        ):
+                            usns.add(usn)
+                            receive_until = time.monotonic() + timeout
+                            pending.append(executor.submit(
+                                self.describe_device, r, model_name,
+                                timeout
+                            ))
+
+                elif not pending:
+                    break
+
+                elif not wait(
+                    pending, timeout=max(receive_until + timeout - now, 0),
+                    return_when=FIRST_COMPLETED
+                )[0]:
+                    log.debug(
+                        "skipping {} devices after deadline".format(
+                            len(pending)
+                        )
+                    )
+                    break
+
+                # yield the devices whose descriptions are available
+                for future in [f for f in pending if f.done()]:
+                    pending.remove(future)
+                    try:
+                        result = future.result()
+
+                    except requests.exceptions.RequestException as e:
+                        log.debug("skipping device: {}".format(e))
+                        continue
+
+                    if (result is None) or (result[0] in found):
+                        continue
+
+                    found.add(result[0])
+                    yield result
+
+                    if (
+                        (expected_count is not None) and
+                        (len(found) >= expected_count)
+                    ):
+                        return
+
+        finally:
+            for s in sockets:
+                s.close()
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
+
     def get_filtered_devices(
-        self, model_name, device_types="upnp:rootdevice", timeout=2
+        self, model_name, device_types="upnp:rootdevice", timeout=2,
+        deadline=None, interfaces=None, mx=1
     ):
         """
         returns a dict of devices that contain the given model name
+
+        the descriptions of the devices are downloaded in parallel, devices
+        that have not replied before the deadline are skipped. Descriptions
+        are cached by the devices' usn until their max-age expires or their
+        location changes
+
+        :param str model_name: model name that must be contained
+        :param str device_types: search target of the discovery
+        :param float timeout: seconds to wait for replies to the discovery
+                              and for each description
+        :param float deadline: maximum seconds of the whole discovery
+                               including the descriptions (default: timeout)
+        :param interfaces: IP addresses of the local interfaces the search
+                           is sent from, "all" for all interfaces or None
+                           for the interfaces of the manager
+        :param int mx: maximum seconds the devices delay their replies
         """
+        start = time.monotonic()
+        end = start + (timeout if deadline is None else deadline)
+
+        # replies are awaited at least for their maximum delay, the rest of
+        # the deadline is left for the descriptions
+        search_end = max(start + mx, end - timeout)
 
         # get list of all UPNP devices in the network
-        upnp_devices = self.discover_upnp_devices(st=device_types)
+        upnp_devices = self.discover_upnp_devices(
+            st=device_types, timeout=timeout, mx=mx, interfaces=interfaces,
+            deadline=search_end - start
+        )
+
+        now = time.monotonic()
+
+        with self._lock:
+            self._evict_expired(now)
+
+            # only devices that are new or whose location has changed
+            # need to be described again
+            descriptions = {}
+            pending = {}
+            for usn, dev in upnp_devices.items():
+                location = getattr(dev, "location", None)
+                if not location:
+                    continue
+
+                entry = self._get_cached_description(
+                    usn, dev, model_name, now
+                )
+                if entry is not None:
+                    descriptions[usn] = entry["result"]
+                else:
+                    pending[usn] = dev
+
+        if pending:
+            log.debug(
+                "downloading descriptions of {} devices...".format(
+                    len(pending)
+                )
+            )
+            descriptions.update(
+                self._describe_devices(pending, model_name, timeout, end)
+            )
 
         # go through all UPNP devices and filter wanted devices
         filtered_devices = collections.defaultdict(dict)
-        for dev in upnp_devices.values():
-            try:
-                # download XML file with information about the device
-                # from the device's location
-                r = requests.get(dev.location, timeout=timeout)
-
-                if r.status_code == requests.codes.ok:
-                    # parse returned XML
-                    root = ET.fromstring(r.text)
-
-                    # add shortcut for XML namespace to access sub nodes
-                    ns = {"upnp": "urn:schemas-upnp-org:device-1-0"}
-
-                    # get device element
-                    device = root.find("upnp:device", ns)
-
-                    if model_name in device.find(
-                        "upnp:modelName", ns
-                    ).text:
-                        # model name is wanted => add to list
-
-                        # get unique UDN of the device that is used as key
-                        udn = device.find("upnp:UDN", ns).text
-
-                        # add url base
-                        url_base = root.find("upnp:URLBase", ns)
-                        if url_base is not None:
-                            filtered_devices[udn][
-                                "URLBase"
-                            ] = url_base.text
-
-                        # add interesting device attributes and
-                        # use unique UDN as key
-                        for attr in (
-                            "deviceType", "friendlyName", "manufacturer",
-                            "manufacturerURL", "modelDescription",
-                            "modelName", "modelNumber"
-                        ):
-                            el = device.find("upnp:%s" % attr, ns)
-                            if el is not None:
-                                filtered_devices[udn][
-                                    attr
-                                ] = el.text.strip()
-
-            except ET.ParseError:
-                # just skip devices that are invalid xml
-                pass
-            except requests.exceptions.ConnectTimeout:
-                # just skip devices that are not replying in time
-                print("Timeout for '%s'. Skipping." % dev.location)
+        for result in descriptions.values():
+            if result is not None:
+                udn, attrs = result
+                filtered_devices[udn].update(attrs)
 
         return filtered_devices
 
+    def _describe_devices(self, devices, model_name, timeout, end):
+        """
+        downloads the descriptions of the given devices in parallel,
+        caches them and returns them by the devices' usn
+
+        :param dict devices: SSDP responses of the devices by their usn
+        :param str model_name: model name that must be contained
+        :param float timeout: seconds to wait for each device
+        :param float end: monotonic time of the deadline of the discovery
+        """
+        # download XML files with information about the devices from the
+        # devices' locations in parallel
+        executor = ThreadPoolExecutor(
+            max_workers=min(self._max_workers, len(devices))
+        )
+        try:
+            futures = dict(
+                (
+                    executor.submit(
+                        self._get_device_description, dev.location,
+                        model_name, timeout, end
+                    ),
+                    usn
+                )
+                for usn, dev in devices.items()
+            )
+            done, not_done = wait(
+                futures, timeout=max(end - time.monotonic(), 0)
+            )
+
+        finally:
+            # do not wait for devices that did not reply before the deadline
+            executor.shutdown(wait=False)
+
+        for future in not_done:
+            future.cancel()
+
+        if not_done:
+            log.debug(
+                "skipping {} devices after deadline".format(len(not_done))
+            )
+
+        descriptions = {}
+        now = time.monotonic()
+        with self._lock:
+            for future in done:
+                usn = futures[future]
+                dev = devices[usn]
+                try:
+                    result = future.result()
+
+                except requests.exceptions.RequestException as e:
+                    # just skip devices that are not replying in time, but
+                    # do not cache them so that they are tried again
+                    log.debug("skipping '{}': {}".format(dev.location, e))
+                    continue
+
+                self._set_cached_description(
+                    usn, dev, model_name, result, now
+                )
+                descriptions[usn] = result
+
+        return descriptions
+
+    def describe_device(self, response, model_name, timeout=2):
+        """
+        returns the UDN and the attributes of the device of the given SSDP
+        response or None, if the model name is not wanted. The description
+        is only downloaded, if it is not cached yet
+
+        :param SSDPResponse response: response or announcement of the device
+        :param str model_name: model name that must be contained
+        :param float timeout: seconds to wait for the device
+        :rtype: tuple
+        """
+        with self._lock:
+            entry = self._get_cached_description(
+                response.usn, response, model_name, time.monotonic()
+            )
+            if entry is not None:
+                return entry["result"]
+
+        result = self._get_device_description(
+            response.location, model_name, timeout,
+            time.monotonic() + timeout
+        )
+
+        with self._lock:
+            self._set_cached_description(
+                response.usn, response, model_name, result, time.monotonic()
+            )
+
+        return result
+
+    def forget_device(self, usn):
+        """
+        removes the cached description of the device with the given usn
+        e.g. when it has left the network
+
+        :param str usn: unique service name of the device
+        """
+        with self._lock:
+            self._descriptions.pop(usn, None)
+
+    def _get_cached_description(self, usn, response, model_name, now):
+        """
+        returns the cached description of the device and extends its
+        lifetime or None, if the device is new or its location has changed
+        (the lock must be held)
+
+        :param str usn: unique service name of the device
+        :param SSDPResponse response: response or announcement of the device
+        :param str model_name: model name that must be contained
+        :param float now: current monotonic time
+        """
+        entry = self._descriptions.get(usn)
+        if (
+            (entry is None) or (entry["expires"] <= now) or
+            (entry["location"] != response.location) or
+            (entry["model_name"] != model_name)
+        ):
+            return None
+
+        # device is still alive => extend its lifetime
+        entry["expires"] = now + get_max_age(response)
+
+        return entry
+
+    def _set_cached_description(self, usn, response, model_name, result, now):
+        """
+        caches the description of the device (the lock must be held)
+
+        :param str usn: unique service name of the device
+        :param SSDPResponse response: response or announcement of the device
+        :param str model_name: model name that must be contained
+        :param tuple result: UDN and attributes of the device or None
+        :param float now: current monotonic time
+        """
+        self._descriptions[usn] = {
+            "location": response.location,
+            "model_name": model_name,
+            "expires": now + get_max_age(response),
+            "result": result,
+        }
+
+    def _get_device_description(self, location, model_name, timeout, end):
+        """
+        downloads and parses the XML description of a device and returns
+        its UDN and attributes or None, if the model name is not wanted
+
+        :param str location: URL of the device description
+        :param str model_name: model name that must be contained
+        :param float timeout: seconds to wait for the device
+        :param float end: monotonic time of the deadline of the discovery
+        """
+        remaining = max(end - time.monotonic(), MIN_TIMEOUT)
+        r = self.get_session().get(
+            location, timeout=min(timeout, remaining), stream=True
+        )
+        try:
+            r.raise_for_status()
+
+            # parse the description while it is received, so that the
+            # rest is skipped as soon as the device is known not to match
+            parser = DeviceDescriptionParser(model_name)
+            for chunk in r.iter_content(DESCRIPTION_CHUNK_SIZE):
+                if parser.feed(chunk):
+                    break
+
+            return parser.close()
+
+        except ET.ParseError:
+            # just skip devices that are invalid xml
+            return None
+
+        finally:
+            r.close()
+
+    def _evict_expired(self, now):
+        """
+        removes the descriptions of devices whose max-age has expired
+
+        :param float now: current monotonic time
+        """
+        for usn in [
+            usn for usn, entry in self._descriptions.items()
+            if entry["expires"] <= now
+        ]:
+            del self._descriptions[usn]
+
+    def clear_cache(self):
+        """
+        removes all cached device descriptions
+        """
+        with self._lock:
+            self._descriptions.clear()
+
+    def get_session(self):
+        """
+        returns the keep-alive session used to download the descriptions
+        of the devices (will be created on first access)
+        """
+        # the workers of the discovery request the session concurrently
+        with self._lock:
+            if self._session is None:
+                self._session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=self._max_workers,
+                    pool_maxsize=self._max_workers
+                )
+                self._session.mount("http://", adapter)
+                self._session.mount("https://", adapter)
+
+            return self._session
+
+    def close(self):
+        """
+        closes the connections of the session
+        """
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
 
 if __name__ == "__main__":
     # small test to obtain all LaMetric devices
@@ -0,0 +1,450 @@
+import os
+import json
+import time
+import codecs
+import logging
+import sqlite3
+import threading
+
+from .cache import get_device_key, get_file_stamp, write_file
+from .const import DEVICES_FILENAME, DEVICES_DB_FILENAME
+
+
+# prepare custom logger
+log = logging.getLogger(__name__)
+
+# attributes of a device that can be used to look it up in a DeviceStore
+DEVICE_KEYS = ("id", "name", "serial_number", "ipv4_internal")
+
+# seconds a process waits for the lock of the database held by another one
+DB_BUSY_TIMEOUT = 10
+
+# schema of the database of a DeviceStore
+DB_SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    key TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    generation INTEGER NOT NULL,
+    id TEXT,
+    name TEXT,
+    serial_number TEXT,
+    ipv4_internal TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS devices_position ON devices (position, key);
+CREATE INDEX IF NOT EXISTS devices_generation ON devices (generation);
+CREATE INDEX IF NOT EXISTS devices_id ON devices (id);
+CREATE INDEX IF NOT EXISTS devices_name ON devices (name);
+CREATE INDEX IF NOT EXISTS devices_serial_number ON devices (serial_number);
+CREATE INDEX IF NOT EXISTS devices_ipv4_internal ON devices (ipv4_internal);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value REAL NOT NULL
+);
+"""
+
+
+class DeviceFile(object):
+    """
+    devices stored as json list in a local file that is replaced
+    atomically on each write
+    """
+    def __init__(self, filename=DEVICES_FILENAME):
+        """
+        initiate the device file
+
+        :param str filename: filename where devices are locally stored
+        """
+        self.filename = os.path.expanduser(filename)
+
+    def get_stamp(self):
+        """
+        returns a stamp that changes whenever the devices are modified
+        (None, if the file is not existing)
+        """
+        return get_file_stamp(self.filename)
+
+    def read(self):
+        """
+        returns the stored devices and the time they were stored, or None
+        if the file is not existing
+        """
+        log.debug("loading devices from '{}'...".format(self.filename))
+        try:
+            with codecs.open(self.filename, "rb", "utf-8") as f:
+                devices = json.load(f)
+            mtime = os.path.getmtime(self.filename)
+
+        except (IOError, OSError):
+            if os.path.exists(self.filename):
+                raise
+
+            return None
+
+        return devices, mtime
+
+    def write(self, devices):
+        """
+        replaces the stored devices via a temporary file, so that concurrent
+        readers never see a partially written file
+
+        :param list devices: devices as obtained from the cloud
+        """
+        log.debug("saving devices to '{}'...".format(self.filename))
+        write_file(self.filename, json.dumps(devices), ".lmdevices-")
+
+    def touch(self):
+        """
+        marks the stored devices as up to date
+        """
+        try:
+            os.utime(self.filename, None)
+
+        except OSError:
+            pass
+
+
+class DeviceStore(object):
+    """
+    devices stored in a SQLite database in WAL mode that is indexed by
+    id, name, serial number and IP address, so that single devices can be
+    looked up and updated without reading and writing all of them. The
+    database can safely be shared by multiple processes
+    """
+    def __init__(self, filename=DEVICES_DB_FILENAME):
+        """
+        initiate the device store
+
+        :param str filename: filename of the database
+        """
+        self.filename = os.path.expanduser(filename)
+
+        # the connection is shared by all threads, so that the data version
+        # only changes on writes of other processes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            self.filename, timeout=DB_BUSY_TIMEOUT, isolation_level=None,
+            check_same_thread=False
+        )
+
+        # number of transactions committed via this store
+        self._commits = 0
+
+        # devices by their key as last read and the generation of the
+        # database at that time, so that only modified devices are read
+        # again
+        self._devices = {}
+        self._generation = -1
+
+        try:
+            # readers do not block the writer and vice versa
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        except sqlite3.DatabaseError as e:
+            # e.g. on network file systems the default journal is kept
+            log.warning(
+                "cannot enable WAL for '{}': {}".format(self.filename, e)
+            )
+
+        with self._lock:
+            self._conn.executescript(DB_SCHEMA)
+
+    def close(self):
+        """
+        closes the database
+        """
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM devices"
+            ).fetchone()[0]
+
+    def get(self, device_id):
+        """
+        returns the device with the given id or None, if it is not stored
+
+        :param device_id: id of the device
+        """
+        devices = self.find(id=device_id)
+
+        return devices[0] if devices else None
+
+    def find(self, **keys):
+        """
+        returns the devices that match all given attributes, e.g.
+        find(serial_number="SA1234567890") or find(ipv4_internal="10.0.0.2")
+
+        :param keys: values of id, name, serial_number or ipv4_internal
+        """
+        if not keys or not set(keys).issubset(DEVICE_KEYS):
+            raise ValueError(
+                "devices can only be found by {}".format(
+                    ", ".join(DEVICE_KEYS)
+                )
+            )
+
+        names = sorted(keys)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM devices WHERE {} ORDER BY position".format(
+                    " AND ".join("{} = ?".format(name) for name in names)
+                ),
+                [self._get_value(keys[name]) for name in names]
+            ).fetchall()
+
+        return [json.loads(data) for data, in rows]
+
+    def get_all(self):
+        """
+        returns all stored devices in the order they have been added
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM devices ORDER BY position"
+            ).fetchall()
+
+        return [json.loads(data) for data, in rows]
+
+    def upsert(self, devices):
+        """
+        atomically adds the given devices or updates them, if they are
+        already stored
+
+        :param list devices: devices as obtained from the cloud
+        """
+        with self._transaction() as cursor:
+            generation = self._next_generation(cursor)
+            position = cursor.execute(
+                "SELECT COALESCE(MAX(position), -1) FROM devices"
+            ).fetchone()[0]
+
+            for dev in devices:
+                # new devices are added after the stored ones
+                if self._store_device(
+                    cursor, dev, generation, None, position + 1
+                ):
+                    position += 1
+
+    def remove(self, dev):
+        """
+        atomically removes the given device
+
+        :param dict dev: device as obtained via get_devices
+        """
+        with self._transaction() as cursor:
+            cursor.execute(
+                "DELETE FROM devices WHERE key = ?", (get_device_key(dev),)
+            )
+
+    def get_stamp(self):
+        """
+        returns a stamp that changes whenever the devices are modified
+        (the data version only changes on commits of other connections)
+        """
+        with self._lock:
+            return (
+                self._conn.execute("PRAGMA data_version").fetchone()[0],
+                self._commits
+            )
+
+    def read(self):
+        """
+        returns all stored devices and the time they were stored, or None
+        if no devices are stored. Only the devices that have been modified
+        since the last call are read from the database
+        """
+        with self._lock:
+            # all queries see the same state of the database
+            self._conn.execute("BEGIN")
+            try:
+                meta = dict(self._conn.execute("SELECT key, value FROM meta"))
+                keys = [
+                    key for key, in self._conn.execute(
+                        "SELECT key FROM devices ORDER BY position"
+                    )
+                ]
+                modified = self._conn.execute(
+                    "SELECT key, data FROM devices WHERE generation > ?",
+                    (self._generation,)
+                ).fetchall()
+
+            finally:
+                self._conn.execute("COMMIT")
+
+            for key, data in modified:
+                self._devices[key] = json.loads(data)
+
+            self._devices = dict((key, self._devices[key]) for key in keys)
+            self._generation = int(meta.get("generation", 0))
+
+            if not keys:
+                return None
+
+            return (
+                [self._devices[key] for key in keys], meta.get("updated", 0)
+            )
+
+    def write(self, devices):
+        """
+        atomically replaces the stored devices, e.g. by the devices
+        obtained from the cloud. Only new and modified devices are written
+        and only the devices that do not exist anymore are removed
+
+        :param list devices: devices as obtained from the cloud
+        """
+        log.debug("saving devices to '{}'...".format(self.filename))
+        with self._transaction() as cursor:
+            generation = self._next_generation(cursor)
+            removed = set(
+                key for key, in cursor.execute("SELECT key FROM devices")
+            )
+
+            for position, dev in enumerate(devices):
+                self._store_device(cursor, dev, generation, position, position)
+                removed.discard(get_device_key(dev))
+
+            cursor.executemany(
+                "DELETE FROM devices WHERE key = ?",
+                [(key,) for key in removed]
+            )
+            self._set_updated(cursor)
+
+    def touch(self):
+        """
+        marks the stored devices as up to date
+        """
+        with self._transaction() as cursor:
+            self._set_updated(cursor)
+
+    def _transaction(self):
+        """
+        returns a context manager of a cursor within a transaction that
+        holds the write lock of the database from the beginning
+        """
+        return _Transaction(self)
+
+    def _store_device(self, cursor, dev, generation, position, new_position):
+        """
+        adds the given device or updates it, if it has been modified, and
+        returns True, if it has been added
+
+        :param sqlite3.Cursor cursor: cursor of the transaction
+        :param dict dev: device as obtained from the cloud
+        :param int generation: generation of the transaction
+        :param int position: position of a stored device (None to keep it)
+        :param int new_position: position of an added device
+        """
+        key = get_device_key(dev)
+        values = [
+            self._get_value(dev.get(name)) for name in DEVICE_KEYS
+        ] + [json.dumps(dev, sort_keys=True, separators=(",", ":"))]
+
+        row = cursor.execute(
+            "SELECT position, data FROM devices WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            cursor.execute(
+                "INSERT INTO devices (id, name, serial_number, "
+                "ipv4_internal, data, key, position, generation) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                values + [key, new_position, generation]
+            )
+            return True
+
+        if position is None:
+            position = row[0]
+
+        if (position, values[-1]) != tuple(row):
+            cursor.execute(
+                "UPDATE devices SET id = ?, name = ?, serial_number = ?, "
+                "ipv4_internal = ?, data = ?, position = ?, generation = ? "
+                "WHERE key = ?",
+                values + [position, generation, key]
+            )
+
+        return False
+
+    def _next_generation(self, cursor):
+        """
+        returns the generation of the current transaction, i.e. devices
+        with a higher generation than the last read have been modified
+
+        :param sqlite3.Cursor cursor: cursor of the transaction
+        """
+        row = cursor.execute(
+            "SELECT value FROM meta WHERE key = 'generation'"
+        ).fetchone()
+        generation = (int(row[0]) if row is not None else 0) + 1
+
+        cursor.execute(
+            "INSERT OR REPLACE INTO meta (key, value) "
+            "VALUES ('generation', ?)", (generation,)
+        )
+
+        return generation
+
+    def _set_updated(self, cursor):
+        """
+        stores the current time as the time the devices were updated
+
+        :param sqlite3.Cursor cursor: cursor of the transaction
+        """
+        cursor.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES ('updated', ?)",
+            (time.time(),)
+        )
+
+    @staticmethod
+    def _get_value(value):
+        """
+        returns the value of a device attribute as stored in the index
+
+        :param value: value of the attribute
+        """
+        return None if value is None else str(value)
+
+
+class _Transaction(object):
+    """
+    transaction of a DeviceStore that is committed when the context is
+    left without an exception and rolled back otherwise
+    """
+    def __init__(self, store):
+        self._store = store
+
+    def __enter__(self):
+        self._store._lock.acquire()
+        try:
+            self._store._conn.execute("BEGIN IMMEDIATE")
+
+        except Exception:
+            self._store._lock.release()
+            raise
+
+        return self._store._conn.cursor()
+
+    def __exit__(self, exc_type, exc, tb):
+        conn = self._store._conn
+        try:
+            if exc_type is None:
+                try:
+                    conn.execute("COMMIT")
+
+                except sqlite3.Error:
+                    # e.g. the database is busy, so the transaction must
+                    # not be left open on the shared connection
+                    if conn.in_transaction:
+                        conn.execute("ROLLBACK")
+                    raise
+
+                self._store._commits += 1
+
+            elif conn.in_transaction:
+                conn.execute("ROLLBACK")
+
+        finally:
+            self._store._lock.release()
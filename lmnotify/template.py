@@ -0,0 +1,141 @@
+import re
+import json
+
+from .const import DEVICE_URLS, PRIORITIES, ICON_TYPES
+
+
+# marker of a placeholder within the encoded notification
+PLACEHOLDER_MARKER = "\x00"
+
+# pattern of an encoded placeholder (the marker is escaped by json)
+PLACEHOLDER_PATTERN = re.compile(r'"\\u0000(\w+)\\u0000"')
+
+
+class Placeholder(object):
+    """
+    placeholder of a value of a frame that is substituted when
+    a NotificationTemplate is rendered, e.g.
+    SimpleFrame("i210", Placeholder("text"))
+    """
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        """
+        initiate the placeholder
+
+        :param str name: name of the value that is substituted
+        """
+        assert(re.match(r"^\w+$", name))
+        self.name = name
+
+    def __repr__(self):
+        return "Placeholder({!r})".format(self.name)
+
+
+def _encode_placeholder(obj):
+    """
+    encodes placeholders as marked strings while serializing the model
+    """
+    if isinstance(obj, Placeholder):
+        return "{0}{1}{0}".format(PLACEHOLDER_MARKER, obj.name)
+
+    raise TypeError("{!r} is not JSON serializable".format(obj))
+
+
+class NotificationTemplate(object):
+    """
+    notification whose fixed parts are encoded only once, so that only
+    the placeholders of the frames are substituted on each render
+    """
+    def __init__(
+        self, model, priority="warning", icon_type=None, lifetime=None,
+        manager=None
+    ):
+        """
+        initiate the notification template
+
+        :param Model model: model that contains frames with placeholders
+        :param str priority: the priority of the notification
+                             [info, warning or critical] (default: warning)
+        :param str icon_type: the icon type of the notification
+                              [none, info or alert] (default: None)
+        :param int lifetime: the lifetime of the notification in ms
+                             (default: 2 min)
+        :param LaMetricManager manager: manager used by send
+        """
+        assert(priority in PRIORITIES)
+        assert(icon_type in ICON_TYPES)
+        assert((lifetime is None) or (lifetime > 0))
+
+        self.priority = priority
+        self._manager = manager
+
+        body = {"model": model.json(), "priority": priority}
+        if icon_type is not None:
+            body["icon_type"] = icon_type
+        if lifetime is not None:
+            body["lifetime"] = lifetime
+
+        encoded = json.dumps(
+            body, separators=(",", ":"), default=_encode_placeholder
+        )
+
+        # split the encoded notification into the fixed parts and the
+        # names of the placeholders in between
+        parts = PLACEHOLDER_PATTERN.split(encoded)
+        self._fixed = [part.encode("utf-8") for part in parts[0::2]]
+        self._names = parts[1::2]
+
+        # dev and policy are reserved for the arguments of send
+        assert(not set(self._names).intersection(("dev", "policy")))
+
+        # names of all placeholders of the template
+        self.names = frozenset(self._names)
+
+    def render(self, **values):
+        """
+        returns the encoded notification with the placeholders substituted
+        by the given values
+
+        :return: json body of the notification
+        :rtype: bytes
+        """
+        missing = self.names.difference(values)
+        if missing:
+            raise KeyError(
+                "missing values for placeholders: {}".format(
+                    ", ".join(sorted(missing))
+                )
+            )
+
+        # encode each value only once, even if used multiple times
+        encoded = dict(
+            (name, json.dumps(values[name]).encode("utf-8"))
+            for name in self.names
+        )
+
+        chunks = [self._fixed[0]]
+        for name, fixed in zip(self._names, self._fixed[1:]):
+            chunks.append(encoded[name])
+            chunks.append(fixed)
+
+        return b"".join(chunks)
+
+    def send(self, dev=None, policy=None, **values):
+        """
+        sends the rendered notification to the device (bypassing the
+        deduplication of send_notification)
+
+        :param dict dev: device the notification is sent to
+                         (default: the current device of the manager)
+        :param RequestPolicy policy: policy overriding the default policy
+                                     for this call
+        """
+        assert(self._manager is not None)
+
+        cmd, url = DEVICE_URLS["send_notification"]
+
+        return self._manager._exec(
+            cmd, url, data=self.render(**values), dev=dev, policy=policy,
+            priority=self.priority
+        )
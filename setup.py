@@ -28,12 +28,7 @@ setup(
         'Intended Audience :: Developers',
         'Topic :: Software Development :: Build Tools',
         'License :: OSI Approved :: MIT License',
-        'Programming Language :: Python :: 2',
-        'Programming Language :: Python :: 2.6',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
-        'Programming Language :: Python :: 3.3',
-        'Programming Language :: Python :: 3.4',
         'Programming Language :: Python :: 3.5',
         'Programming Language :: Python :: 3.6',
     ],
@@ -41,6 +36,14 @@ setup(
     packages=find_packages(
         exclude=['contrib', 'docs', 'tests']
     ),
-    install_requires=["requests", "oauthlib", "requests_oauthlib"],
+    python_requires=">=3.5",
+    install_requires=[
+        "requests", "oauthlib", "requests_oauthlib",
+    ],
+    extras_require={
+        "async": ["aiohttp"],
+        "numpy": ["numpy"],
+        "icons": ["Pillow"],
+    },
 )
 
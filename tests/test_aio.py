@@ -0,0 +1,60 @@
+import time
+import asyncio
+import unittest
+
+from lmnotify.aio import AsyncCloudSession
+
+
+class CountingCloudSession(AsyncCloudSession):
+    """
+    cloud session whose token endpoint only counts the requests
+    """
+    def __init__(self, fail=False):
+        AsyncCloudSession.__init__(self, "id", "secret")
+        self.fail = fail
+        self.requests = 0
+
+    async def get_token(self):
+        self.requests += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise IOError("token endpoint not available")
+
+        self.token = {"expires_at": time.time() + 3600}
+
+
+class AsyncCloudSessionTest(unittest.TestCase):
+    def check_token(self, session, count):
+        session.token = {"expires_at": time.time() - 1}
+
+        async def check():
+            return await asyncio.gather(
+                *[session._check_token() for _ in range(count)],
+                return_exceptions=True
+            )
+
+        loop = asyncio.new_event_loop()
+        try:
+            return loop.run_until_complete(check())
+        finally:
+            loop.close()
+
+    def test_expired_token_is_renewed_once(self):
+        session = CountingCloudSession()
+        self.assertEqual(self.check_token(session, 10), [None] * 10)
+        self.assertEqual(session.requests, 1)
+        self.assertIsNone(session._refresh_task)
+
+    def test_failed_renewal_is_raised_to_all_requests(self):
+        session = CountingCloudSession(fail=True)
+        results = self.check_token(session, 3)
+        self.assertTrue(all(isinstance(r, IOError) for r in results))
+        self.assertEqual(session.requests, 1)
+
+        # the next request tries again
+        self.check_token(session, 1)
+        self.assertEqual(session.requests, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import requests
+
+from lmnotify import LaMetricManager
+from lmnotify.cache import AppListCache, DeviceListCache
+from lmnotify.const import CLOUD_URLS
+from lmnotify.store import DeviceFile
+
+
+DEVICES = [{"id": 1, "name": "LaMetric", "ipv4_internal": "10.0.0.1"}]
+
+
+class CloudHandler(BaseHTTPRequestHandler):
+    """
+    devices endpoint of the cloud that supports ETags
+    """
+    etag = '"v1"'
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append(self.headers.get("If-None-Match"))
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+
+        data = json.dumps(DEVICES).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("ETag", self.etag)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeCloudSession(object):
+    """
+    unauthenticated replacement of the cloud session
+    """
+    def __init__(self):
+        self.session = requests.Session()
+
+
+class AppListCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dirname, "apps.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_persisted_apps_are_loaded(self):
+        cache = AppListCache(filename=self.filename)
+        cache.set(DEVICES[0], {"com.lametric.clock": {}})
+
+        cache = AppListCache(filename=self.filename)
+        self.assertEqual(cache.get(DEVICES[0]), {"com.lametric.clock": {}})
+        self.assertEqual(os.listdir(self.dirname), ["apps.json"])
+
+    def test_invalid_file_is_ignored(self):
+        for content in ("{", "[]", "null"):
+            with open(self.filename, "w") as f:
+                f.write(content)
+
+            cache = AppListCache(filename=self.filename)
+            self.assertIsNone(cache.get(DEVICES[0]))
+
+            cache.set(DEVICES[0], {})
+            self.assertEqual(cache.get(DEVICES[0]), {})
+
+    def test_unreadable_file_is_ignored(self):
+        os.mkdir(self.filename)
+        cache = AppListCache(filename=self.filename)
+        self.assertIsNone(cache.get(DEVICES[0]))
+
+        # the directory cannot be replaced, but the apps are still cached
+        cache.set(DEVICES[0], {})
+        self.assertEqual(cache.get(DEVICES[0]), {})
+        self.assertEqual(os.listdir(self.dirname), ["apps.json"])
+
+
+class DeviceListCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dirname, "devices.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dirname)
+
+    def test_file_is_only_read_again_when_modified(self):
+        storage = DeviceFile(self.filename)
+        cache = DeviceListCache(storage)
+        self.assertIsNone(cache.get())
+        self.assertEqual(cache.load(), [])
+
+        storage.write(DEVICES)
+        devices = cache.get()
+        self.assertEqual(devices, DEVICES)
+        self.assertIs(cache.get(), devices)
+
+        storage.write([{"id": 2, "ipv4_internal": "10.0.0.2"}])
+        self.assertEqual(cache.get()[0]["id"], 2)
+
+        os.remove(self.filename)
+        self.assertIsNone(cache.get())
+
+    def test_ttl_and_validators(self):
+        cache = DeviceListCache(DeviceFile(self.filename), ttl=0.05)
+        self.assertEqual(cache.get_validators(), {})
+
+        cache.set(DEVICES, {"ETag": '"v1"', "Content-Type": "x"})
+        self.assertEqual(cache.get_validators(), {"If-None-Match": '"v1"'})
+        self.assertEqual(cache.get(), DEVICES)
+
+        time.sleep(0.1)
+        self.assertIsNone(cache.get())
+
+        # a 304 response restarts the TTL
+        self.assertEqual(cache.touch(), DEVICES)
+        self.assertEqual(cache.get(), DEVICES)
+
+    def test_validators_are_dropped_when_modified_by_others(self):
+        storage = DeviceFile(self.filename)
+        cache = DeviceListCache(storage)
+        cache.set(DEVICES, {"ETag": '"v1"'})
+        cache.save(DEVICES)
+        self.assertEqual(cache.get_validators(), {"If-None-Match": '"v1"'})
+
+        DeviceFile(self.filename).write(DEVICES + DEVICES)
+        self.assertEqual(len(cache.get()), 2)
+        self.assertEqual(cache.get_validators(), {})
+
+
+class ConditionalRefreshTest(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.server = HTTPServer(("127.0.0.1", 0), CloudHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        CloudHandler.requests = []
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        shutil.rmtree(self.dirname)
+
+    def test_not_modified_response_keeps_devices(self):
+        lmn = LaMetricManager(
+            client_id="id", client_secret="secret", auto_load_config=False,
+            config_filename=os.path.join(self.dirname, "config"),
+            devices_filename=os.path.join(self.dirname, "devices"),
+            devices_ttl=0.05
+        )
+        lmn._cloud_session = FakeCloudSession()
+
+        url = "http://127.0.0.1:{}/devices".format(self.server.server_port)
+        original = CLOUD_URLS["get_devices"]
+        CLOUD_URLS["get_devices"] = ("GET", url)
+        try:
+            self.assertEqual(lmn.get_devices(), DEVICES)
+            self.assertEqual(lmn.get_devices(), DEVICES)
+            self.assertEqual(CloudHandler.requests, [None])
+
+            time.sleep(0.1)
+            self.assertEqual(lmn.get_devices(), DEVICES)
+            self.assertEqual(CloudHandler.requests, [None, '"v1"'])
+
+            # the TTL has been restarted by the 304 response
+            self.assertEqual(lmn.get_devices(), DEVICES)
+            self.assertEqual(len(CloudHandler.requests), 2)
+
+        finally:
+            CLOUD_URLS["get_devices"] = original
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import json
+import unittest
+
+from lmnotify import Model, SimpleFrame, GoalFrame, Sound
+
+
+def get_texts(model):
+    """
+    returns the texts of the frames of the encoded notification
+    """
+    body = json.loads(model.encode().decode("utf-8"))
+
+    return [frame.get("text") for frame in body["model"]["frames"]]
+
+
+class ModelTest(unittest.TestCase):
+    def test_changed_frame_is_encoded_again(self):
+        frame = SimpleFrame("i1", "a")
+        model = Model(frames=[frame])
+        self.assertEqual(get_texts(model), ["a"])
+
+        frame.text = "b"
+        self.assertEqual(get_texts(model), ["b"])
+
+    def test_frames_replaced_in_place_are_encoded_again(self):
+        model = Model(frames=[SimpleFrame("i1", "a"), SimpleFrame("i1", "b")])
+        self.assertEqual(get_texts(model), ["a", "b"])
+
+        model.frames[0] = SimpleFrame("i3", "x")
+        self.assertEqual(get_texts(model), ["x", "b"])
+
+        model.frames[1:] = [SimpleFrame("i3", "y"), SimpleFrame("i3", "z")]
+        self.assertEqual(get_texts(model), ["x", "y", "z"])
+
+        del model.frames[0]
+        model.frames.reverse()
+        self.assertEqual(get_texts(model), ["z", "y"])
+
+        # frames added via the list notify the model as well
+        frame = SimpleFrame("i1", "c")
+        model.frames.insert(0, frame)
+        frame.text = "d"
+        self.assertEqual(get_texts(model), ["d", "z", "y"])
+
+    def test_assigned_frames_and_sound_are_encoded(self):
+        model = Model()
+        model.frames = [GoalFrame("i1", current=50)]
+        model.sound = Sound("notifications", "bicycle")
+        model.sound.repeat = 2
+
+        body = json.loads(model.encode().decode("utf-8"))
+        self.assertEqual(body["model"]["frames"][0]["goalData"]["current"], 50)
+        self.assertEqual(body["model"]["sound"]["repeat"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
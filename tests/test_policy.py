@@ -0,0 +1,189 @@
+import time
+import socket
+import struct
+import asyncio
+import threading
+import unittest
+
+import aiohttp
+import requests
+
+from lmnotify.aio import AsyncLaMetricManager
+from lmnotify.lmnotify import get_failure
+from lmnotify.policy import RequestPolicy, FAILURE_CONNECT, FAILURE_READ
+
+
+class RequestPolicyTest(unittest.TestCase):
+    def test_idempotent_commands_are_retried_on_any_failure(self):
+        policy = RequestPolicy()
+        for cmd in ("GET", "PUT", "DELETE"):
+            self.assertTrue(policy.is_retryable(cmd, FAILURE_CONNECT))
+            self.assertTrue(policy.is_retryable(cmd, FAILURE_READ))
+            self.assertTrue(policy.is_retryable(cmd, 503))
+            self.assertFalse(policy.is_retryable(cmd, 404))
+
+    def test_post_is_only_retried_if_not_processed(self):
+        policy = RequestPolicy()
+        self.assertTrue(policy.is_retryable("POST", FAILURE_CONNECT))
+        self.assertTrue(policy.is_retryable("POST", 429))
+        self.assertFalse(policy.is_retryable("POST", FAILURE_READ))
+        self.assertFalse(policy.is_retryable("POST", 500))
+
+    def test_retry_delay_is_limited_by_retries_and_backoff(self):
+        policy = RequestPolicy(retries=2, backoff_factor=0.1, max_backoff=0.15)
+        for attempt in range(2):
+            delay = policy.get_retry_delay("GET", attempt, 503, None)
+            self.assertTrue(0 <= delay <= 0.15)
+
+        self.assertIsNone(policy.get_retry_delay("GET", 2, 503, None))
+        self.assertIsNone(policy.get_retry_delay("POST", 1, 429, None))
+        self.assertIsNone(policy.get_retry_delay("GET", 0, 404, None))
+
+    def test_retry_delay_respects_deadline(self):
+        policy = RequestPolicy(backoff_factor=10, max_backoff=10)
+        deadline = time.monotonic() + 0.001
+        time.sleep(0.002)
+        self.assertIsNone(policy.get_retry_delay("GET", 0, 503, deadline))
+
+    def test_timeout_is_limited_by_deadline(self):
+        policy = RequestPolicy(connect_timeout=3, read_timeout=10)
+        self.assertEqual(policy.get_timeout(None), (3, 10))
+
+        connect, read = policy.get_timeout(time.monotonic() + 1)
+        self.assertTrue(0 < connect <= 1)
+        self.assertTrue(0 < read <= 1)
+
+        connect, read = policy.get_timeout(time.monotonic() - 1)
+        self.assertTrue(connect > 0 and read > 0)
+
+
+class GetFailureTest(unittest.TestCase):
+    def get_error(self, url):
+        with self.assertRaises(requests.exceptions.RequestException) as cm:
+            requests.post(url, data=b"{}", timeout=2)
+
+        return cm.exception
+
+    def test_refused_connection_is_connect_failure(self):
+        s = socket.socket()
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+        s.close()
+
+        error = self.get_error("http://127.0.0.1:{}/".format(port))
+        self.assertEqual(get_failure(error), FAILURE_CONNECT)
+
+    def test_aborted_connection_is_read_failure(self):
+        server = socket.socket()
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+
+        def serve():
+            # read the request, then close without a response
+            conn, _ = server.accept()
+            conn.recv(65536)
+            conn.close()
+
+        thread = threading.Thread(target=serve)
+        thread.start()
+        try:
+            error = self.get_error(
+                "http://127.0.0.1:{}/".format(server.getsockname()[1])
+            )
+        finally:
+            thread.join()
+            server.close()
+
+        self.assertEqual(get_failure(error), FAILURE_READ)
+
+
+class AbortingServer(object):
+    """
+    server that reads each request and then aborts the connection,
+    either by a reset or after an incomplete response
+    """
+    def __init__(self, reset):
+        self.reset = reset
+        self._socket = socket.socket()
+        self._socket.bind(("127.0.0.1", 0))
+        self._socket.listen(5)
+        self._socket.settimeout(0.05)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._serve)
+        self._thread.start()
+
+    @property
+    def url(self):
+        return "http://127.0.0.1:{}/".format(self._socket.getsockname()[1])
+
+    def _serve(self):
+        while not self._stopped.is_set():
+            try:
+                conn, _ = self._socket.accept()
+            except socket.timeout:
+                continue
+
+            conn.recv(65536)
+            if self.reset:
+                # close with RST instead of FIN
+                conn.setsockopt(
+                    socket.SOL_SOCKET, socket.SO_LINGER,
+                    struct.pack("ii", 1, 0)
+                )
+            else:
+                conn.sendall(
+                    b"HTTP/1.1 200 OK\r\nContent-Length: 100\r\n\r\n{}"
+                )
+            conn.close()
+
+    def close(self):
+        self._stopped.set()
+        self._thread.join()
+        self._socket.close()
+
+
+class CountingRateLimiter(object):
+    """
+    rate limiter that counts the attempts of requests
+    """
+    def __init__(self):
+        self.attempts = 0
+
+    async def acquire_async(self, dev, priority):
+        self.attempts += 1
+
+
+class AsyncRequestTest(unittest.TestCase):
+    def request(self, cmd, reset):
+        server = AbortingServer(reset)
+        rate_limiter = CountingRateLimiter()
+        manager = AsyncLaMetricManager(
+            client_id="id", client_secret="secret", auto_load_config=False,
+            request_policy=RequestPolicy(retries=2, backoff_factor=0.01),
+            rate_limiter=rate_limiter
+        )
+
+        async def request():
+            async with aiohttp.ClientSession() as session:
+                with self.assertRaises(aiohttp.ClientError):
+                    await manager._request(
+                        session, cmd, server.url, dev={"id": 1}
+                    )
+
+        try:
+            asyncio.get_event_loop_policy().new_event_loop() \
+                .run_until_complete(request())
+        finally:
+            server.close()
+
+        return rate_limiter.attempts
+
+    def test_aborted_connections_are_retried_as_read_failures(self):
+        for reset in (True, False):
+            self.assertEqual(self.request("GET", reset), 3)
+            self.assertEqual(self.request("PUT", reset), 3)
+            self.assertEqual(self.request("POST", reset), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from lmnotify.store import DeviceStore
+
+
+def make_device(device_id, name="LaMetric", serial_number=None, ip=None):
+    return {
+        "id": device_id,
+        "name": name,
+        "serial_number": serial_number or "SA{:010d}".format(device_id),
+        "ipv4_internal": ip or "10.0.0.{}".format(device_id),
+    }
+
+
+class FailingCommitConnection(object):
+    """
+    proxy of a connection whose next COMMIT fails as if the database
+    was busy
+    """
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def execute(self, sql, *args):
+        if sql == "COMMIT":
+            raise sqlite3.OperationalError("database is locked")
+
+        return self._conn.execute(sql, *args)
+
+
+class DeviceStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.dirname = tempfile.mkdtemp()
+        self.filename = os.path.join(self.dirname, "devices.db")
+        self.store = DeviceStore(self.filename)
+        self.other = DeviceStore(self.filename)
+
+    def tearDown(self):
+        self.store.close()
+        self.other.close()
+        shutil.rmtree(self.dirname)
+
+    def test_upsert_is_visible_to_other_connection(self):
+        stamp = self.other.get_stamp()
+        self.store.upsert([make_device(1), make_device(2, name="Kitchen")])
+
+        self.assertNotEqual(self.other.get_stamp(), stamp)
+        self.assertEqual(self.other.get(2)["name"], "Kitchen")
+        self.assertEqual(
+            self.other.find(serial_number="SA0000000001")[0]["id"], 1
+        )
+        self.assertEqual(
+            [dev["id"] for dev in self.other.find(name="LaMetric")], [1]
+        )
+        self.assertEqual(self.other.find(ipv4_internal="10.0.0.9"), [])
+
+    def test_upsert_updates_and_appends(self):
+        self.store.upsert([make_device(1), make_device(2)])
+        self.other.upsert([make_device(3), make_device(1, name="Office")])
+
+        devices = self.store.get_all()
+        self.assertEqual([dev["id"] for dev in devices], [1, 2, 3])
+        self.assertEqual(devices[0]["name"], "Office")
+        self.assertEqual(len(self.store), 3)
+
+    def test_find_by_multiple_keys(self):
+        self.store.upsert([
+            make_device(1, name="Office"), make_device(2, name="Office")
+        ])
+        devices = self.store.find(name="Office", ipv4_internal="10.0.0.2")
+        self.assertEqual([dev["id"] for dev in devices], [2])
+
+    def test_find_rejects_unknown_keys(self):
+        with self.assertRaises(ValueError):
+            self.store.find(api_key="secret")
+
+        with self.assertRaises(ValueError):
+            self.store.find()
+
+    def test_write_only_modifies_changed_devices(self):
+        def get_generations():
+            return dict(self.store._conn.execute(
+                "SELECT key, generation FROM devices"
+            ))
+
+        self.store.write([make_device(1), make_device(2), make_device(3)])
+        self.assertEqual(len(self.other.read()[0]), 3)
+        before = get_generations()
+
+        self.store.write([
+            make_device(1), make_device(3, name="Renamed"), make_device(4)
+        ])
+        after = get_generations()
+
+        # device 1 is unchanged, device 3 is modified and moved, device 4
+        # is new and device 2 is removed
+        self.assertEqual(after["1"], before["1"])
+        self.assertGreater(after["3"], before["3"])
+        self.assertEqual(after["4"], after["3"])
+        self.assertNotIn("2", after)
+
+        devices, _ = self.other.read()
+        self.assertEqual([dev["id"] for dev in devices], [1, 3, 4])
+        self.assertEqual(devices[1]["name"], "Renamed")
+        self.assertIsNone(self.other.get(2))
+
+    def test_read_of_empty_store(self):
+        self.assertIsNone(self.store.read())
+        self.store.write([make_device(1)])
+        self.store.write([])
+        self.assertIsNone(self.other.read())
+
+    def test_failed_commit_is_rolled_back(self):
+        conn = self.store._conn
+        self.store._conn = FailingCommitConnection(conn)
+        with self.assertRaises(sqlite3.OperationalError):
+            self.store.upsert([make_device(1)])
+
+        self.store._conn = conn
+        self.assertFalse(conn.in_transaction)
+        self.assertEqual(self.other.get_all(), [])
+
+        # the connection and its lock are still usable
+        self.store.upsert([make_device(1)])
+        self.assertEqual(len(self.other), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()